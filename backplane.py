@@ -0,0 +1,350 @@
+"""
+Módulo de backplane pub/sub para los eventos de sesión entre procesos
+
+Funcionalidades:
+- Interfaz común para repartir eventos entre workers de uvicorn o pods
+- Implementación en memoria (un solo proceso, la opción por defecto)
+- Implementación sobre el protocolo de Redis (RESP) con asyncio, sin dependencias
+- Broker local compatible (SUBSCRIBE/PUBLISH) para desarrollo y pruebas sin Redis:
+  python backplane.py --serve 6380
+"""
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from structured_logging import get_logger
+
+log = get_logger("backplane")
+
+# handler(envelope, local): local indica si el evento se originó en este proceso
+Handler = Callable[[Dict[str, Any], bool], None]
+
+
+class Backplane:
+    """
+    Reparte sobres {"kind", "client_id", ...} a todos los procesos.
+    El proceso que publica los recibe al instante; el resto, a través del transporte.
+    """
+    # True si hay otros procesos al otro lado (los sobres salen de este proceso)
+    shared = False
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+        self._handler: Optional[Handler] = None
+
+    async def start(self, handler: Handler):
+        self._handler = handler
+
+    def post(self, envelope: Dict[str, Any]) -> Awaitable[None]:
+        """
+        Entrega el sobre localmente y lo encola para el resto sin esperar: el orden
+        de las llamadas es el orden de entrega, también desde callbacks síncronos.
+        Devuelve un awaitable que termina cuando el transporte lo confirmó.
+        """
+        envelope = {**envelope, "origin": self.worker_id}
+        if self._handler is not None:
+            self._handler(envelope, True)
+        return self._transmit(envelope)
+
+    async def publish(self, envelope: Dict[str, Any]):
+        try:
+            await self.post(envelope)
+        except (OSError, ConnectionError) as e:
+            log.warning("No se pudo publicar en el backplane", kind=envelope.get("kind"), error=str(e))
+
+    def _transmit(self, envelope: Dict[str, Any]) -> Awaitable[None]:
+        done = asyncio.get_running_loop().create_future()
+        done.set_result(None)
+        return done
+
+    def _receive(self, envelope: Dict[str, Any]):
+        if envelope.get("origin") != self.worker_id and self._handler is not None:
+            self._handler(envelope, False)
+
+    async def close(self):
+        pass
+
+
+class InMemoryBackplane(Backplane):
+    """Un solo proceso: los eventos solo se entregan localmente"""
+
+
+def _encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader):
+    """Lee una respuesta RESP (simple, error, entero, bulk o array)"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("conexión cerrada por el servidor")
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b"+":
+        return payload.decode("utf-8")
+    if prefix == b"-":
+        raise ConnectionError(payload.decode("utf-8"))
+    if prefix == b":":
+        return int(payload)
+    if prefix == b"$":
+        length = int(payload)
+        if length == -1:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"respuesta RESP inválida: {line!r}")
+
+
+class RedisBackplane(Backplane):
+    """
+    Backplane sobre Redis (o cualquier servidor que hable RESP con SUBSCRIBE/PUBLISH).
+    Usa una conexión para publicar y otra dedicada a la suscripción, que se
+    restablece sola si se cae.
+    """
+    shared = True
+
+    def __init__(self, host: str = "localhost", port: int = 6379, password: Optional[str] = None,
+                 db: int = 0, channel: str = "gensite:sessions"):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.password = password
+        self.db = db
+        self.channel = channel
+        self._publisher: Optional[asyncio.StreamWriter] = None
+        self._publisher_reader: Optional[asyncio.StreamReader] = None
+        # Sobres en espera: mientras un lote está en vuelo se acumulan y salen juntos en el siguiente
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._subscriber: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackplane":
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, parsed.password, db)
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(_encode_command("AUTH", self.password))
+            await _read_reply(reader)
+        if self.db:
+            writer.write(_encode_command("SELECT", self.db))
+            await _read_reply(reader)
+        return reader, writer
+
+    async def start(self, handler: Handler):
+        await super().start(handler)
+        self._subscriber = asyncio.create_task(self._subscribe_loop())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), 5)
+        except asyncio.TimeoutError:
+            log.warning("El backplane todavía no está suscrito", host=self.host, port=self.port)
+
+    async def _subscribe_loop(self):
+        delay = 0.5
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._open()
+                writer.write(_encode_command("SUBSCRIBE", self.channel))
+                await writer.drain()
+                await _read_reply(reader)
+                self._subscribed.set()
+                delay = 0.5
+                log.info("Backplane suscrito", host=self.host, port=self.port, channel=self.channel)
+                while True:
+                    reply = await _read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        try:
+                            self._receive(json.loads(reply[2]))
+                        except ValueError:
+                            log.warning("Mensaje inválido en el backplane")
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                self._subscribed.clear()
+                log.warning("Conexión del backplane perdida", error=str(e), retry_in=delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    def _transmit(self, envelope: Dict[str, Any]) -> Awaitable[None]:
+        """
+        Los PUBLISH concurrentes se agrupan en un pipeline: una escritura y un
+        viaje de ida y vuelta por lote en lugar de uno por evento. Se encolan en
+        el orden de las llamadas y una única tarea los envía.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((_encode_command("PUBLISH", self.channel, json.dumps(envelope)), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return future
+
+    async def _flush(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self._send_batch([command for command, _ in batch])
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                error = ConnectionError(str(e))
+            except asyncio.CancelledError:
+                # Cierre del backplane: nadie debe quedarse esperando
+                for _, pending in batch + self._pending:
+                    if not pending.done():
+                        pending.set_exception(ConnectionError("backplane cerrado"))
+                self._pending = []
+                raise
+            else:
+                error = None
+            for _, pending in batch:
+                if pending.done():
+                    continue
+                if error is None:
+                    pending.set_result(None)
+                else:
+                    pending.set_exception(error)
+
+    async def _send_batch(self, commands: List[bytes]):
+        for attempt in range(2):
+            try:
+                if self._publisher is None or self._publisher.is_closing():
+                    self._publisher_reader, self._publisher = await self._open()
+                self._publisher.write(b"".join(commands))
+                await self._publisher.drain()
+                for _ in commands:
+                    await _read_reply(self._publisher_reader)
+                return
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                if self._publisher is not None:
+                    self._publisher.close()
+                self._publisher = None
+                if attempt:
+                    raise
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            try:
+                await self._subscriber
+            except asyncio.CancelledError:
+                pass
+            self._subscriber = None
+        if self._publisher is not None:
+            self._publisher.close()
+            self._publisher = None
+
+
+def backplane_from_env(value: Optional[str]) -> Backplane:
+    """GENSITE_BACKPLANE: vacío o "memory" (por defecto) o "redis://host:puerto/db" """
+    if not value or value == "memory":
+        return InMemoryBackplane()
+    if value.startswith("redis://"):
+        return RedisBackplane.from_url(value)
+    raise ValueError(f"GENSITE_BACKPLANE no soportado: {value}")
+
+
+class LocalPubSubServer:
+    """
+    Broker mínimo compatible con RESP (PING, SUBSCRIBE, UNSUBSCRIBE, PUBLISH).
+    Sirve para repartir eventos entre varios workers de una máquina sin Redis
+    y como sustituto local en pruebas.
+    """
+
+    def __init__(self):
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 6380) -> int:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscribed: List[bytes] = []
+        try:
+            while True:
+                command = await _read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    break
+                name = command[0].upper()
+                if name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif name in (b"AUTH", b"SELECT"):
+                    writer.write(b"+OK\r\n")
+                elif name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        self.channels.setdefault(channel, set()).add(writer)
+                        subscribed.append(channel)
+                        writer.write(_encode_array([b"subscribe", channel, len(subscribed)]))
+                elif name == b"UNSUBSCRIBE":
+                    for channel in command[1:] or list(subscribed):
+                        self.channels.get(channel, set()).discard(writer)
+                        if channel in subscribed:
+                            subscribed.remove(channel)
+                        writer.write(_encode_array([b"unsubscribe", channel, len(subscribed)]))
+                elif name == b"PUBLISH":
+                    channel, message = command[1], command[2]
+                    receivers = list(self.channels.get(channel, ()))
+                    for receiver in receivers:
+                        receiver.write(_encode_array([b"message", channel, message]))
+                    writer.write(b":%d\r\n" % len(receivers))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # La conexión del cliente terminó o el broker se está apagando
+            pass
+        finally:
+            for channel in subscribed:
+                self.channels.get(channel, set()).discard(writer)
+            writer.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def _encode_array(items: List[Any]) -> bytes:
+    parts = [b"*%d\r\n" % len(items)]
+    for item in items:
+        if isinstance(item, int):
+            parts.append(b":%d\r\n" % item)
+        else:
+            parts.append(b"$%d\r\n%s\r\n" % (len(item), item))
+    return b"".join(parts)
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def _serve(port: int):
+        server = LocalPubSubServer()
+        port = await server.start("127.0.0.1", port)
+        print(f"Broker local escuchando en redis://127.0.0.1:{port}")
+        await asyncio.Event().wait()
+
+    if len(sys.argv) != 3 or sys.argv[1] != "--serve":
+        sys.exit("Uso: python backplane.py --serve PUERTO")
+    asyncio.run(_serve(int(sys.argv[2])))
@@ -0,0 +1,218 @@
+"""
+Módulo de almacén de blobs direccionado por contenido
+
+Funcionalidades:
+- Cada contenido se guarda una sola vez, con su SHA-256 como clave
+  (los package.json, index.html... repetidos entre proyectos no ocupan más disco)
+- Compresión zstd opcional cuando el paquete zstandard está instalado y compensa
+- Caché en memoria de los blobs más usados con presupuesto en bytes; los blobs
+  aún no escritos en disco quedan fijados en memoria hasta el volcado
+- Recolección por conteo de referencias: los manifiestos persistidos suman
+  referencias y los blobs sin ninguna se borran en segundo plano
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from project_files import write_atomic
+from structured_logging import get_logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+log = get_logger("blob_store")
+
+_ZSTD_SUFFIX = ".zst"
+
+
+def blob_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Blobs en directory/objects/ab/<sha256>[.zst]. Los métodos son síncronos y
+    seguros entre hilos; las operaciones de disco se llaman con asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, memory_budget: int = 256 * 1024 * 1024,
+                 compression_level: int = 3, min_compress_size: int = 512):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.compression_level = compression_level
+        self.min_compress_size = min_compress_size
+        self._hot: "OrderedDict[str, bytes]" = OrderedDict()
+        self._hot_bytes = 0
+        self._pending: Dict[str, bytes] = {}
+        self.refcounts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.deduplicated = 0
+        self.collected = 0
+
+    def path_for(self, digest: str, compressed: bool = False) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest + (_ZSTD_SUFFIX if compressed else ""))
+
+    def raw_path(self, digest: str) -> Optional[str]:
+        """Ruta del blob si está en disco sin comprimir (se puede enviar con sendfile)"""
+        path = self.path_for(digest)
+        return path if os.path.exists(path) else None
+
+    def add(self, data: bytes, digest: Optional[str] = None) -> str:
+        """
+        Registra un contenido en memoria; se escribe en disco con persist().
+        Queda fijado aunque ya esté en la caché: el blob de disco pudo borrarse
+        (recolección de otro proceso) y persist() tiene que poder reescribirlo.
+        """
+        digest = digest or blob_digest(data)
+        with self._lock:
+            self._pending.setdefault(digest, data)
+        return digest
+
+    def pending(self, digests: Iterable[str]) -> Set[str]:
+        """Los hashes de digests que aún no se han escrito en disco"""
+        with self._lock:
+            return {digest for digest in digests if digest in self._pending}
+
+    def persist(self, digest: str) -> bool:
+        """Escribe el blob si todavía no existe en disco; devuelve True si hubo escritura"""
+        with self._lock:
+            data = self._pending.get(digest)
+        if data is None:
+            return False
+        written = False
+        if not os.path.exists(self.path_for(digest)) and not os.path.exists(self.path_for(digest, True)):
+            compressed = self._compress(data)
+            if compressed is not None:
+                write_atomic(self.path_for(digest, True), compressed)
+            else:
+                write_atomic(self.path_for(digest), data)
+            written = True
+        with self._lock:
+            self._pending.pop(digest, None)
+            if written:
+                self.writes += 1
+            else:
+                self.deduplicated += 1
+            self._remember(digest, data)
+        return written
+
+    def _compress(self, data: bytes) -> Optional[bytes]:
+        if zstandard is None or len(data) < self.min_compress_size:
+            return None
+        compressed = zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        # Solo compensa si ahorra al menos un 10 % (imágenes y similares no lo hacen)
+        return compressed if len(compressed) < len(data) * 0.9 else None
+
+    def get(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._pending.get(digest)
+            if data is None:
+                data = self._hot.get(digest)
+                if data is not None:
+                    self._hot.move_to_end(digest)
+            if data is not None:
+                return data
+        data = self._read(digest)
+        if data is not None:
+            with self._lock:
+                self._remember(digest, data)
+        return data
+
+    def peek(self, digest: str) -> Optional[bytes]:
+        """Contenido si está en memoria, sin tocar el disco"""
+        with self._lock:
+            data = self._pending.get(digest)
+            return data if data is not None else self._hot.get(digest)
+
+    def _read(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self.path_for(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.path_for(digest, True), "rb") as f:
+                compressed = f.read()
+        except FileNotFoundError:
+            return None
+        if zstandard is None:
+            raise RuntimeError("Blob comprimido con zstd pero el paquete zstandard no está instalado")
+        return zstandard.ZstdDecompressor().decompress(compressed)
+
+    def _remember(self, digest: str, data: bytes):
+        if digest in self._hot:
+            self._hot.move_to_end(digest)
+            return
+        self._hot[digest] = data
+        self._hot_bytes += len(data)
+        while self._hot_bytes > self.memory_budget and len(self._hot) > 1:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_bytes -= len(evicted)
+
+    def drop_pending(self, in_use: Set[str]):
+        """Olvida los contenidos sin escribir que ya no usa ningún espacio de trabajo"""
+        with self._lock:
+            for digest in [digest for digest in self._pending if digest not in in_use]:
+                del self._pending[digest]
+
+    def incref(self, digests: Iterable[str]):
+        with self._lock:
+            for digest in digests:
+                self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+
+    def decref(self, digests: Iterable[str]):
+        with self._lock:
+            for digest in digests:
+                count = self.refcounts.get(digest, 0) - 1
+                if count > 0:
+                    self.refcounts[digest] = count
+                else:
+                    self.refcounts.pop(digest, None)
+
+    def collect(self, in_use: Set[str], grace: float = 300.0) -> int:
+        """
+        Borra los blobs de disco sin referencias persistidas ni uso en memoria.
+        grace protege a los recién escritos cuyo manifiesto aún no se guardó.
+        """
+        removed = 0
+        cutoff = time.time() - grace
+        objects = os.path.join(self.directory, "objects")
+        if not os.path.isdir(objects):
+            return 0
+        for prefix in os.scandir(objects):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                digest = entry.name[:-len(_ZSTD_SUFFIX)] if entry.name.endswith(_ZSTD_SUFFIX) else entry.name
+                with self._lock:
+                    referenced = digest in self.refcounts or digest in self._pending
+                if referenced or digest in in_use or entry.stat().st_mtime > cutoff:
+                    continue
+                os.unlink(entry.path)
+                with self._lock:
+                    if self._hot.pop(digest, None) is not None:
+                        self._hot_bytes = sum(len(data) for data in self._hot.values())
+                removed += 1
+        self.collected += removed
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "referenced_blobs": len(self.refcounts),
+                "hot_blobs": len(self._hot),
+                "hot_bytes": self._hot_bytes,
+                "pending_blobs": len(self._pending),
+                "writes": self.writes,
+                "deduplicated": self.deduplicated,
+                "collected": self.collected,
+                "compression": zstandard is not None,
+            }
@@ -1,4 +1,3 @@
-<<<<<<< HEAD
 """
 Módulo core del sistema GENSITE
 
@@ -9,12 +8,20 @@ Contiene la lógica principal para:
 - Conexión con backend Supabase
 """
 
-from supabase_handler import SupabaseHandler
 from fastapi import FastAPI, WebSocket
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Any
 import asyncio
 from enum import Enum
 import json
+from metrics import WEBSOCKET_CONNECTIONS
+from websocket_fanout import ConnectionChannel, ConnectionHub, encode_event
+# detectar_intenciones y clasificar_mensajes viven en intent_matcher; se reexportan aquí
+from intent_matcher import DESPEDIDAS, INTENCIONES, SALUDOS, clasificar_mensajes, detectar_intenciones, matcher_for  # noqa: F401
+from template_engine import TemplateRegistry
+from default_templates import DEFAULT_TEMPLATES
+from structured_logging import get_logger
+
+log = get_logger("core")
 
 class CodeGenerationEvent(str, Enum):
     THINKING = "thinking"
@@ -41,20 +48,26 @@ class GeneradorCodigo:
     
     def __init__(self):
         """Inicializa el generador con configuraciones básicas"""
-        self.plantillas = {}
+        self.plantillas = TemplateRegistry()
+        for nombre, (contenido, parametros) in DEFAULT_TEMPLATES.items():
+            self.plantillas.register(nombre, contenido, defaults=parametros)
         self.project_templates = self._load_default_templates()
-        self.supabase = SupabaseHandler()
-        self.intenciones = {
-            'generar': ['crear', 'hacer', 'generar', 'construir'],
-            'modificar': ['cambiar', 'editar', 'ajustar', 'modificar'],
-            'consultar': ['preguntar', 'consultar', 'saber', 'información']
-        }
+        self._supabase = None
+        self.intenciones = INTENCIONES
         self.respuestas = {
             'saludo': '¡Hola! Soy tu asistente para generación de código. ¿En qué puedo ayudarte hoy?',
             'despedida': '¡Gracias por usar GENSITE! Vuelve cuando necesites más ayuda.',
             'error': 'No entendí tu solicitud. ¿Podrías reformularla?'
         }
         
+    @property
+    def supabase(self):
+        """Manejador de Supabase; se importa y se crea la primera vez que se usa"""
+        if self._supabase is None:
+            from supabase_handler import SupabaseHandler
+            self._supabase = SupabaseHandler()
+        return self._supabase
+
     def _load_default_templates(self) -> Dict[str, ProjectTemplate]:
         """Carga las plantillas predefinidas para tipos de proyectos"""
         return {
@@ -75,9 +88,19 @@ class GeneradorCodigo:
             )
         }
         
-    def cargar_plantilla(self, nombre, contenido):
-        """Carga una nueva plantilla para generación de código"""
-        self.plantillas[nombre] = contenido
+    def cargar_plantilla(self, nombre, contenido, version=None):
+        """Carga una nueva plantilla ({{ variable }}) para generación de código"""
+        self.plantillas.register(nombre, contenido, version)
+        
+    def sincronizar_plantillas(self, forzar=False):
+        """
+        Descarga de la tabla plantillas de Supabase las que cambiaron desde la
+        última vez (bloqueante; sin conexión se usa la caché local)
+        
+        Returns:
+            int: Número de plantillas descargadas
+        """
+        return self.plantillas.sync(self.supabase, force=forzar)
         
     def generar_codigo(self, nombre_plantilla, parametros):
         """
@@ -90,10 +113,16 @@ class GeneradorCodigo:
         Returns:
             str: Código generado
         """
-        if nombre_plantilla not in self.plantillas:
-            raise ValueError(f"Plantilla '{nombre_plantilla}' no encontrada")
-            
-        return self.plantillas[nombre_plantilla].format(**parametros)
+        return self.plantillas.render(nombre_plantilla, parametros)
+        
+    def generar_codigo_stream(self, nombre_plantilla, parametros):
+        """
+        Igual que generar_codigo, pero devuelve el código por fragmentos
+        
+        Returns:
+            Iterator[str]: Fragmentos del código generado
+        """
+        return self.plantillas.stream(nombre_plantilla, parametros)
         
     def procesar_entrada(self, texto):
         """
@@ -105,21 +134,25 @@ class GeneradorCodigo:
         Returns:
             str: Respuesta generada
         """
-        texto = texto.lower()
+        # Una sola búsqueda para saludos, despedidas e intenciones
+        encontradas = [match.intent for match in matcher_for(self._tabla_conversacion()).match(texto)]
         
         # Detección de saludos/despedidas
-        if any(palabra in texto for palabra in ['hola', 'hi', 'buenos']):
+        if 'saludo' in encontradas:
             return self.respuestas['saludo']
-        if any(palabra in texto for palabra in ['adiós', 'chao', 'gracias']):
+        if 'despedida' in encontradas:
             return self.respuestas['despedida']
             
-        # Detección de intenciones
-        for intencion, palabras in self.intenciones.items():
-            if any(palabra in texto for palabra in palabras):
-                return f"Entendí que quieres {intencion} algo. Por favor proporcióname más detalles."
+        # Detección de intenciones (la de más coincidencias primero)
+        intenciones = [intencion for intencion in encontradas if intencion in self.intenciones]
+        if intenciones:
+            return f"Entendí que quieres {intenciones[0]} algo. Por favor proporcióname más detalles."
                 
         return self.respuestas['error']
         
+    def _tabla_conversacion(self) -> Dict[str, List[str]]:
+        return {'saludo': SALUDOS, 'despedida': DESPEDIDAS, **self.intenciones}
+        
     def convertir_accion(self, accion_no_code):
         """
         Convierte una acción NO-CODE a código real
@@ -145,7 +178,7 @@ class GeneradorCodigo:
             respuesta = self.procesar_entrada(entrada)
             print(f"Asistente: {respuesta}")
             
-            if any(palabra in entrada.lower() for palabra in ['adiós', 'chao', 'gracias']):
+            if matcher_for({'despedida': DESPEDIDAS}).intents_in(entrada):
                 break
                 
     def generar_desde_conversacion(self):
@@ -160,33 +193,28 @@ class GeneradorCodigo:
 
 class CodeGenerationManager:
     def __init__(self):
-        self.active_sessions: Dict[str, List[WebSocket]] = {}
+        self.hub = ConnectionHub()
+
+    @property
+    def active_sessions(self) -> Dict[str, List[ConnectionChannel]]:
+        return self.hub.connections
         
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
-        if session_id not in self.active_sessions:
-            self.active_sessions[session_id] = []
-        self.active_sessions[session_id].append(websocket)
+        self.hub.add(session_id, websocket)
         
     def disconnect(self, websocket: WebSocket, session_id: str):
-        if session_id in self.active_sessions:
-            if websocket in self.active_sessions[session_id]:
-                self.active_sessions[session_id].remove(websocket)
-            if not self.active_sessions[session_id]:
-                del self.active_sessions[session_id]
+        self.hub.remove(session_id, websocket)
                 
     async def broadcast_event(self, session_id: str, event_type: CodeGenerationEvent, data: Any):
         if session_id in self.active_sessions:
-            message = {
-                "type": event_type,
+            # Se codifica una sola vez y cada conexión lo envía desde su propia cola
+            message = encode_event({
+                "type": event_type.value,
                 "data": data,
                 "timestamp": asyncio.get_event_loop().time()
-            }
-            for connection in self.active_sessions[session_id]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    await self.disconnect(connection, session_id)
+            })
+            self.hub.publish(session_id, message)
 
 class CodeGenerator:
     def __init__(self, events_manager: CodeGenerationManager):
@@ -243,6 +271,9 @@ class CodeGenerator:
 # Configuración de la aplicación FastAPI
 app = FastAPI()
 code_gen_manager = CodeGenerationManager()
+WEBSOCKET_CONNECTIONS.labels(manager="core").set_function(
+    lambda: sum(len(connections) for connections in code_gen_manager.active_sessions.values())
+)
 code_generator = CodeGenerator(code_gen_manager)
 
 @app.websocket("/ws/{session_id}")
@@ -258,154 +289,6 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                     request.get("prompt", "")
                 )
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        log.error("Error en el WebSocket", session_id=session_id, error=str(e))
     finally:
         code_gen_manager.disconnect(websocket, session_id)
-=======
-"""
-Módulo core del sistema GENSITE
-
-Contiene la lógica principal para:
-- Generación de código
-- Procesamiento de plantillas
-- Conversión de acciones NO-CODE a código real
-- Conexión con backend Supabase
-"""
-
-from supabase_handler import SupabaseHandler
-
-class ProjectTemplate:
-    """Clase base para plantillas de proyectos"""
-    
-    def __init__(self, name: str, description: str, components: List[str]):
-        self.name = name
-        self.description = description
-        self.components = components
-    
-    def validate(self) -> bool:
-        """Valida si la plantilla está correctamente configurada"""
-        return bool(self.name and self.components)
-
-
-class GeneradorCodigo:
-    """Clase principal para la generación de código"""
-    
-    def __init__(self):
-        """Inicializa el generador con configuraciones básicas"""
-        self.plantillas = {}
-        self.project_templates = self._load_default_templates()
-        self.supabase = SupabaseHandler()
-        self.intenciones = {
-            'generar': ['crear', 'hacer', 'generar', 'construir'],
-            'modificar': ['cambiar', 'editar', 'ajustar', 'modificar'],
-            'consultar': ['preguntar', 'consultar', 'saber', 'información']
-        }
-        self.respuestas = {
-            'saludo': '¡Hola! Soy tu asistente para generación de código. ¿En qué puedo ayudarte hoy?',
-            'despedida': '¡Gracias por usar GENSITE! Vuelve cuando necesites más ayuda.',
-            'error': 'No entendí tu solicitud. ¿Podrías reformularla?'
-        }
-        
-    def _load_default_templates(self) -> Dict[str, ProjectTemplate]:
-        """Carga las plantillas predefinidas para tipos de proyectos"""
-        return {
-            "landing": ProjectTemplate(
-                "Landing Page",
-                "Plantilla para páginas de aterrizaje con componentes esenciales",
-                ["header", "hero", "features", "testimonials", "cta", "footer"]
-            ),
-            "multipage": ProjectTemplate(
-                "Sitio Web Multi-página",
-                "Plantilla para sitios con múltiples páginas y navegación",
-                ["header", "navigation", "content_sections", "footer"]
-            ),
-            "ecommerce": ProjectTemplate(
-                "E-commerce",
-                "Plantilla para tiendas online con pasarelas de pago",
-                ["header", "product_grid", "cart", "checkout", "payment_gateways", "footer"]
-            )
-        }
-        
-    def cargar_plantilla(self, nombre, contenido):
-        """Carga una nueva plantilla para generación de código"""
-        self.plantillas[nombre] = contenido
-        
-    def generar_codigo(self, nombre_plantilla, parametros):
-        """
-        Genera código basado en una plantilla y parámetros
-        
-        Args:
-            nombre_plantilla (str): Nombre de la plantilla a usar
-            parametros (dict): Diccionario con parámetros para la plantilla
-            
-        Returns:
-            str: Código generado
-        """
-        if nombre_plantilla not in self.plantillas:
-            raise ValueError(f"Plantilla '{nombre_plantilla}' no encontrada")
-            
-        return self.plantillas[nombre_plantilla].format(**parametros)
-        
-    def procesar_entrada(self, texto):
-        """
-        Procesa el texto del usuario para determinar su intención
-        
-        Args:
-            texto (str): Entrada del usuario
-            
-        Returns:
-            str: Respuesta generada
-        """
-        texto = texto.lower()
-        
-        # Detección de saludos/despedidas
-        if any(palabra in texto for palabra in ['hola', 'hi', 'buenos']):
-            return self.respuestas['saludo']
-        if any(palabra in texto for palabra in ['adiós', 'chao', 'gracias']):
-            return self.respuestas['despedida']
-            
-        # Detección de intenciones
-        for intencion, palabras in self.intenciones.items():
-            if any(palabra in texto for palabra in palabras):
-                return f"Entendí que quieres {intencion} algo. Por favor proporcióname más detalles."
-                
-        return self.respuestas['error']
-        
-    def convertir_accion(self, accion_no_code):
-        """
-        Convierte una acción NO-CODE a código real
-        
-        Args:
-            accion_no_code (dict): Acción en formato NO-CODE
-            
-        Returns:
-            str: Código equivalente
-        """
-        # Lógica de conversión aquí
-        pass
-        
-    def iniciar_conversacion(self):
-        """Inicia una conversación interactiva con el usuario"""
-        print(self.respuestas['saludo'])
-        
-        while True:
-            entrada = input("Usuario: ").strip()
-            if not entrada:
-                continue
-                
-            respuesta = self.procesar_entrada(entrada)
-            print(f"Asistente: {respuesta}")
-            
-            if any(palabra in entrada.lower() for palabra in ['adiós', 'chao', 'gracias']):
-                break
-                
-    def generar_desde_conversacion(self):
-        """
-        Genera código basado en una conversación con el usuario
-        
-        Returns:
-            str: Código generado
-        """
-        self.iniciar_conversacion()
-        return "# Código generado desde la conversación"
->>>>>>> 90d22681d2c30acb385206e300b3ba63575d2b65
@@ -0,0 +1,221 @@
+"""
+Plantillas predefinidas de GENSITE (landing, multipage y ecommerce)
+
+Cada plantilla es una página HTML completa con sus estilos, escrita con la
+sintaxis de template_engine, y tiene parámetros por defecto para poder
+renderizarse sin configurar nada.
+"""
+
+_BASE_STYLES = """
+    * { box-sizing: border-box; }
+    body { margin: 0; font-family: system-ui, sans-serif; color: #1f2933; background: #f8fafc; }
+    header { display: flex; align-items: center; justify-content: space-between; padding: 1rem 2rem; background: #fff; box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08); }
+    header a { color: inherit; text-decoration: none; margin-left: 1.5rem; }
+    .logo { font-weight: 700; color: {{ color_primario }}; }
+    .button { display: inline-block; padding: 0.75rem 1.5rem; border-radius: 0.5rem; background: {{ color_primario }}; color: #fff; text-decoration: none; border: none; cursor: pointer; }
+    section { padding: 4rem 2rem; max-width: 1100px; margin: 0 auto; }
+    .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(240px, 1fr)); gap: 1.5rem; }
+    .card { background: #fff; border-radius: 0.75rem; padding: 1.5rem; box-shadow: 0 2px 8px rgba(0, 0, 0, 0.06); }
+    footer { padding: 2rem; text-align: center; color: #64748b; }
+"""
+
+LANDING = """<!DOCTYPE html>
+<html lang="{{ idioma }}">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>{{ titulo | escape }}</title>
+  <meta name="description" content="{{ descripcion | escape }}">
+  <style>""" + _BASE_STYLES + """    .hero { text-align: center; padding: 6rem 2rem; background: linear-gradient(135deg, {{ color_primario }}, {{ color_secundario }}); color: #fff; max-width: none; }
+    .hero h1 { font-size: 3rem; margin: 0 0 1rem; }
+    .hero .button { background: #fff; color: {{ color_primario }}; }
+    blockquote { margin: 0; font-style: italic; }
+    .cta { text-align: center; }
+  </style>
+</head>
+<body>
+  <header>
+    <span class="logo">{{ titulo | escape }}</span>
+    <nav>{{#each secciones as seccion}}<a href="#{{ seccion.id }}">{{ seccion.nombre | escape }}</a>{{/each}}</nav>
+  </header>
+  <section class="hero">
+    <h1>{{ hero.titulo | escape }}</h1>
+    <p>{{ hero.subtitulo | escape }}</p>
+    <a class="button" href="{{ hero.enlace }}">{{ hero.boton | escape }}</a>
+  </section>
+  <section id="features" class="grid">
+    {{#each features as feature}}<div class="card">
+      <h3>{{ feature.titulo | escape }}</h3>
+      <p>{{ feature.texto | escape }}</p>
+    </div>
+    {{/each}}
+  </section>
+  {{#if testimonios}}<section id="testimonios" class="grid">
+    {{#each testimonios as testimonio}}<div class="card">
+      <blockquote>“{{ testimonio.texto | escape }}”</blockquote>
+      <p>— {{ testimonio.autor | escape }}</p>
+    </div>
+    {{/each}}
+  </section>
+  {{/if}}<section id="contacto" class="cta">
+    <h2>{{ cta.titulo | escape }}</h2>
+    <a class="button" href="{{ cta.enlace }}">{{ cta.boton | escape }}</a>
+  </section>
+  <footer>© {{ anio }} {{ titulo | escape }}</footer>
+</body>
+</html>
+"""
+
+MULTIPAGE = """<!DOCTYPE html>
+<html lang="{{ idioma }}">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>{{ titulo | escape }}</title>
+  <style>""" + _BASE_STYLES + """    .page { display: none; }
+    .page.visible { display: block; }
+    nav a.activo { color: {{ color_primario }}; }
+  </style>
+</head>
+<body>
+  <header>
+    <span class="logo">{{ titulo | escape }}</span>
+    <nav>{{#each paginas as pagina}}<a href="#{{ pagina.id }}">{{ pagina.nombre | escape }}</a>{{/each}}</nav>
+  </header>
+  <main>
+    {{#each paginas as pagina}}<section id="{{ pagina.id }}" class="page">
+      <h1>{{ pagina.nombre | escape }}</h1>
+      {{#each pagina.secciones as seccion}}<div class="card">
+        <h2>{{ seccion.titulo | escape }}</h2>
+        <p>{{ seccion.texto | escape }}</p>
+      </div>
+      {{/each}}
+    </section>
+    {{/each}}
+  </main>
+  <footer>© {{ anio }} {{ titulo | escape }}</footer>
+  <script>
+    function mostrar() {
+      const paginas = document.querySelectorAll('.page');
+      const actual = document.getElementById(location.hash.slice(1)) || paginas[0];
+      paginas.forEach(function (pagina) { pagina.classList.toggle('visible', pagina === actual); });
+      document.querySelectorAll('nav a').forEach(function (link) {
+        link.classList.toggle('activo', link.getAttribute('href') === '#' + actual.id);
+      });
+    }
+    window.addEventListener('hashchange', mostrar);
+    mostrar();
+  </script>
+</body>
+</html>
+"""
+
+ECOMMERCE = """<!DOCTYPE html>
+<html lang="{{ idioma }}">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>{{ titulo | escape }}</title>
+  <style>""" + _BASE_STYLES + """    .product img { width: 100%; aspect-ratio: 4 / 3; object-fit: cover; border-radius: 0.5rem; }
+    .price { font-size: 1.25rem; font-weight: 700; color: {{ color_primario }}; }
+    #cart { position: fixed; right: 1rem; bottom: 1rem; width: 280px; }
+    #checkout { margin-top: 1rem; width: 100%; }
+  </style>
+</head>
+<body>
+  <header>
+    <span class="logo">{{ titulo | escape }}</span>
+    <span>🛒 <span id="cart-count">0</span></span>
+  </header>
+  <section id="productos" class="grid">
+    {{#each productos as producto}}<div class="card product">
+      <img src="{{ producto.imagen }}" alt="{{ producto.nombre | escape }}">
+      <h3>{{ producto.nombre | escape }}</h3>
+      <p>{{ producto.descripcion | escape }}</p>
+      <p class="price">{{ producto.precio }} {{ moneda }}</p>
+      <button class="button" data-id="{{ producto.id }}" data-price="{{ producto.precio }}">Añadir al carrito</button>
+    </div>
+    {{/each}}
+  </section>
+  <aside id="cart" class="card">
+    <h3>Carrito</h3>
+    <ul id="cart-items"></ul>
+    <p>Total: <span id="cart-total">0</span> {{ moneda }}</p>
+    <button id="checkout" class="button">Pagar con {{#each pasarelas as pasarela}}{{ pasarela }} {{/each}}</button>
+  </aside>
+  <footer>© {{ anio }} {{ titulo | escape }}</footer>
+  <script>
+    const productos = {{ productos | json }};
+    const carrito = {};
+    function actualizar() {
+      const items = Object.entries(carrito);
+      document.getElementById('cart-count').textContent = items.reduce((total, [, cantidad]) => total + cantidad, 0);
+      document.getElementById('cart-items').innerHTML = items.map(([id, cantidad]) => {
+        const producto = productos.find((p) => String(p.id) === id);
+        return `<li>${producto.nombre} × ${cantidad}</li>`;
+      }).join('');
+      document.getElementById('cart-total').textContent = items
+        .reduce((total, [id, cantidad]) => total + productos.find((p) => String(p.id) === id).precio * cantidad, 0)
+        .toFixed(2);
+    }
+    document.querySelectorAll('[data-id]').forEach((button) => {
+      button.addEventListener('click', () => {
+        carrito[button.dataset.id] = (carrito[button.dataset.id] || 0) + 1;
+        actualizar();
+      });
+    });
+  </script>
+</body>
+</html>
+"""
+
+_COMMON_DEFAULTS = {
+    "idioma": "es",
+    "titulo": "Mi sitio",
+    "descripcion": "Sitio generado con GENSITE",
+    "color_primario": "#2563eb",
+    "color_secundario": "#7c3aed",
+    "anio": 2025,
+}
+
+DEFAULT_TEMPLATES = {
+    "landing": (LANDING, {
+        **_COMMON_DEFAULTS,
+        "secciones": [{"id": "features", "nombre": "Características"},
+                      {"id": "testimonios", "nombre": "Opiniones"},
+                      {"id": "contacto", "nombre": "Contacto"}],
+        "hero": {"titulo": "Tu idea, en línea hoy", "subtitulo": "Una página rápida, clara y lista para vender",
+                 "boton": "Empezar", "enlace": "#contacto"},
+        "features": [{"titulo": "Rápida", "texto": "Carga en menos de un segundo."},
+                     {"titulo": "Adaptable", "texto": "Se ve bien en cualquier pantalla."},
+                     {"titulo": "Lista para crecer", "texto": "Añade secciones cuando las necesites."}],
+        "testimonios": [{"autor": "Ana", "texto": "Tuvimos la web lista en una tarde."}],
+        "cta": {"titulo": "¿Hablamos?", "boton": "Contactar", "enlace": "mailto:hola@example.com"},
+    }),
+    "multipage": (MULTIPAGE, {
+        **_COMMON_DEFAULTS,
+        "paginas": [
+            {"id": "inicio", "nombre": "Inicio",
+             "secciones": [{"titulo": "Bienvenido", "texto": "Esta es la página principal."}]},
+            {"id": "servicios", "nombre": "Servicios",
+             "secciones": [{"titulo": "Diseño", "texto": "Sitios a medida."},
+                           {"titulo": "Desarrollo", "texto": "Aplicaciones web modernas."}]},
+            {"id": "contacto", "nombre": "Contacto",
+             "secciones": [{"titulo": "Escríbenos", "texto": "hola@example.com"}]},
+        ],
+    }),
+    "ecommerce": (ECOMMERCE, {
+        **_COMMON_DEFAULTS,
+        "titulo": "Mi tienda",
+        "moneda": "EUR",
+        "pasarelas": ["Stripe", "PayPal"],
+        "productos": [
+            {"id": 1, "nombre": "Camiseta", "descripcion": "Algodón orgánico.", "precio": 19.9,
+             "imagen": "https://picsum.photos/seed/camiseta/400/300"},
+            {"id": 2, "nombre": "Zapatillas", "descripcion": "Para correr.", "precio": 59.9,
+             "imagen": "https://picsum.photos/seed/zapatillas/400/300"},
+            {"id": 3, "nombre": "Mochila", "descripcion": "20 litros.", "precio": 34.5,
+             "imagen": "https://picsum.photos/seed/mochila/400/300"},
+        ],
+    }),
+}
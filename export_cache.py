@@ -0,0 +1,218 @@
+"""
+Módulo de caché de exportaciones del proyecto
+
+Funcionalidades:
+- Identifica el proyecto con un hash tipo Merkle del árbol de archivos
+  (cada carpeta se resume con los hashes de sus hijos)
+- Reutiliza las entradas ZIP ya comprimidas de los archivos que no cambiaron:
+  al modificar un archivo solo se comprime esa entrada
+- En las descargas en streaming los archivos grandes se comprimen por fragmentos
+  según se envían, sin pasar por la caché de entradas
+- Guarda en disco los últimos ZIP completos para servir las descargas repetidas
+  sin recorrer ni comprimir nada; el hash del proyecto es el ETag de la descarga.
+  La memoria solo la ocupan las entradas comprimidas, acotadas por max_entry_bytes
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from zip_stream import StreamedFile, ZipEntry, compress_bytes, zip_from_entries
+
+# load(sha256) -> contenido del archivo (por ejemplo BlobStore.get)
+Loader = Callable[[str], Optional[bytes]]
+
+CHUNK_SIZE = 64 * 1024
+
+
+def merkle_hash(files: Iterable[Tuple[str, str]]) -> str:
+    """Hash del árbol a partir de (ruta con "/", sha256 del contenido)"""
+    # Carpetas y archivos se indexan por (tipo, nombre): "a" y "a/b.html" pueden convivir
+    tree: Dict = {}
+    for arcname, digest in files:
+        *folders, filename = arcname.split("/")
+        node = tree
+        for folder in folders:
+            node = node.setdefault(("d", folder), {})
+        node[("f", filename)] = digest
+
+    def node_hash(node: Dict) -> str:
+        h = hashlib.sha256()
+        for kind, name in sorted(node, key=lambda key: (key[1], key[0])):
+            child = node[(kind, name)]
+            child_hash = node_hash(child) if kind == "d" else child
+            h.update(f"{kind} {name}\0{child_hash}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    return node_hash(tree)
+
+
+def read_chunks(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Recorre un ZIP abierto por artifact() y lo cierra al terminar"""
+    with f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                return
+            yield block
+
+
+class ExportCache:
+    """
+    Entradas comprimidas por (ruta, hash del contenido) en memoria y ZIP completos
+    por hash del proyecto en directory, ambos con LRU por tamaño. Los métodos son
+    síncronos y seguros entre hilos: se llaman con asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, max_entry_bytes: int = 64 * 1024 * 1024, max_artifacts: int = 8,
+                 max_artifact_bytes: int = 32 * 1024 * 1024, max_disk_bytes: int = 256 * 1024 * 1024,
+                 stream_threshold: int = 1024 * 1024):
+        self.directory = directory
+        # En stream(), los archivos mayores se comprimen al vuelo en vez de guardarse como entrada
+        self.stream_threshold = stream_threshold
+        self.max_entry_bytes = max_entry_bytes
+        self.max_artifacts = max_artifacts
+        self.max_artifact_bytes = max_artifact_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[Tuple[str, str], ZipEntry]" = OrderedDict()
+        self._entry_bytes = 0
+        # hash del proyecto -> tamaño del ZIP en disco
+        self._artifacts: "OrderedDict[str, int]" = OrderedDict()
+        self._artifact_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reused_entries = 0
+        self.compressed_entries = 0
+        os.makedirs(directory, exist_ok=True)
+        # Los ZIP de ejecuciones anteriores siguen valiendo: su nombre es el hash del proyecto
+        previous = sorted((entry for entry in os.scandir(directory) if entry.name.endswith(".zip")),
+                          key=lambda entry: entry.stat().st_mtime)
+        for entry in previous:
+            self._artifacts[entry.name[:-len(".zip")]] = entry.stat().st_size
+            self._artifact_bytes += entry.stat().st_size
+        self._evict_artifacts()
+
+    def _artifact_path(self, project_hash: str) -> str:
+        return os.path.join(self.directory, f"{project_hash}.zip")
+
+    def _evict_artifacts(self):
+        while self._artifacts and (len(self._artifacts) > self.max_artifacts
+                                   or self._artifact_bytes > self.max_disk_bytes):
+            project_hash, size = self._artifacts.popitem(last=False)
+            self._artifact_bytes -= size
+            # Quien ya lo tenga abierto lo sigue leyendo; otro worker puede haberlo borrado antes
+            try:
+                os.unlink(self._artifact_path(project_hash))
+            except FileNotFoundError:
+                pass
+
+    def artifact(self, project_hash: str, files: List[Tuple[str, str]], load: Loader) -> Optional[BinaryIO]:
+        """
+        ZIP del proyecto abierto para lectura (desde la caché si no cambió), para
+        enviarlo con read_chunks. Devuelve None si superaría max_artifact_bytes o si
+        un archivo cambió durante la exportación; en ese caso se envía con stream().
+        """
+        path = self._artifact_path(project_hash)
+        with self._lock:
+            if project_hash in self._artifacts:
+                try:
+                    cached = open(path, "rb")
+                except FileNotFoundError:
+                    self._artifact_bytes -= self._artifacts.pop(project_hash)
+                else:
+                    self._artifacts.move_to_end(project_hash)
+                    self.hits += 1
+                    return cached
+            self.misses += 1
+
+        entries = []
+        total = 0
+        consistent = True
+        for arcname, digest in files:
+            entry = self.entry(arcname, digest, load)
+            consistent = consistent and entry.digest == digest
+            total += len(entry.data)
+            if total > self.max_artifact_bytes:
+                return None
+            entries.append(entry)
+        # Si un archivo cambió mientras se exportaba, el ZIP no corresponde al hash
+        if not consistent:
+            return None
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in zip_from_entries(entries):
+                    out.write(chunk)
+            os.replace(temporary, path)
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            # Se abre antes de expulsar nada para que la expulsión no lo borre antes de enviarlo
+            artifact = open(path, "rb")
+            size = os.fstat(artifact.fileno()).st_size
+            self._artifact_bytes += size - self._artifacts.pop(project_hash, 0)
+            self._artifacts[project_hash] = size
+            self._evict_artifacts()
+        return artifact
+
+    def stream(self, files: List[Tuple[str, str]], load: Loader) -> Iterator[bytes]:
+        """ZIP por fragmentos, comprimiendo cada entrada solo cuando se necesita"""
+        return zip_from_entries(self._stream_entry(arcname, digest, load) for arcname, digest in files)
+
+    def _stream_entry(self, arcname: str, digest: str, load: Loader) -> Union[ZipEntry, StreamedFile]:
+        entry = self._cached(arcname, digest)
+        if entry is not None:
+            return entry
+        data = load(digest) or b""
+        if len(data) > self.stream_threshold:
+            return StreamedFile(arcname, data)
+        return self._compress(arcname, data)
+
+    def _cached(self, arcname: str, digest: str) -> Optional[ZipEntry]:
+        key = (arcname, digest)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.reused_entries += 1
+            return entry
+
+    def entry(self, arcname: str, digest: str, load: Loader) -> ZipEntry:
+        """Entrada comprimida del archivo; se reutiliza mientras su contenido no cambie"""
+        entry = self._cached(arcname, digest)
+        if entry is not None:
+            return entry
+        return self._compress(arcname, load(digest) or b"")
+
+    def _compress(self, arcname: str, data: bytes) -> ZipEntry:
+        entry = compress_bytes(arcname, data)
+        with self._lock:
+            self.compressed_entries += 1
+            if (arcname, entry.digest) not in self._entries:
+                self._entries[(arcname, entry.digest)] = entry
+                self._entry_bytes += len(entry.data)
+            while self._entry_bytes > self.max_entry_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._entry_bytes -= len(evicted.data)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "artifacts": len(self._artifacts),
+                "artifact_bytes": self._artifact_bytes,
+                "entries": len(self._entries),
+                "entry_bytes": self._entry_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reused_entries": self.reused_entries,
+                "compressed_entries": self.compressed_entries,
+            }
@@ -0,0 +1,125 @@
+"""
+Módulo de envío de archivos en crudo
+
+Funcionalidades:
+- ETag fuerte (el SHA-256 del contenido) y respuestas 304 con If-None-Match
+- Peticiones Range de un solo rango (206 / 416), con If-Range
+- Content-Type según la extensión, corrigiendo los tipos que el sistema adivina mal
+- Los blobs guardados sin comprimir se envían desde el disco con FileResponse,
+  sin cargarlos en memoria; el resto se sirve desde memoria
+"""
+import mimetypes
+import os
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+
+# mimetypes toma .ts por MPEG-TS y no conoce .tsx/.jsx
+_CONTENT_TYPES = {
+    ".ts": "text/plain",
+    ".tsx": "text/plain",
+    ".jsx": "text/javascript",
+    ".mjs": "text/javascript",
+    ".map": "application/json",
+    ".webmanifest": "application/manifest+json",
+}
+_TEXT_TYPES = ("application/javascript", "application/json", "application/xml", "image/svg+xml",
+               "application/manifest+json")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_type(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lower()
+    media_type = _CONTENT_TYPES.get(extension) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in _TEXT_TYPES:
+        return f"{media_type}; charset=utf-8"
+    return media_type
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (inicio, fin) inclusivo de una cabecera "bytes=a-b", "bytes=a-" o "bytes=-n".
+    Devuelve None si no hay rango, pide varios o no es válido, como "bytes=5-2"
+    (RFC 9110: se ignora la cabecera y se envía el archivo completo).
+    """
+    if not header or not header.startswith("bytes=") or "," in header or size == 0:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if not start:
+            length = int(end)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if end and first > last:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    return first, min(last, size - 1)
+
+
+def _file_chunks(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def raw_response(request: Request, filename: str, digest: str, size: int,
+                 path: Optional[str] = None, data: Optional[bytes] = None) -> Response:
+    """
+    Respuesta para un archivo identificado por su hash: desde path (en disco,
+    sin comprimir) o desde data (en memoria).
+    """
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    media_type = content_type(filename)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        if path is not None:
+            # FileResponse lee el archivo por fragmentos en el thread pool
+            return FileResponse(path, media_type=media_type, headers=headers)
+        return Response(content=data, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    if path is not None:
+        return StreamingResponse(_file_chunks(path, start, end), status_code=206, media_type=media_type, headers=headers)
+    return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
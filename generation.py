@@ -0,0 +1,225 @@
+"""
+Módulo de generación de proyectos con el modelo de IA
+
+Funcionalidades:
+- Configuración del proveedor (OpenAI o Deepseek según GENSITE_MODEL) y mensajes del modelo
+- Extracción y validación de los archivos generados, con continuación de las respuestas truncadas
+- sync_generate_code: generación síncrona completa; no depende de FastAPI ni del
+  servidor, así que los workers de la cola de trabajos la importan sin cargar main
+- Los errores de configuración (clave ausente o rechazada) se marcan como permanentes:
+  reintentarlos no sirve de nada
+"""
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from json_stream import extract_files
+from metrics import GENERATION_RESULTS, PROVIDER_ERRORS, PROVIDER_LATENCY, record_usage
+from structured_logging import get_logger, payload_ref
+from tracing import tracer
+
+# Variables de entorno del .env (también en los workers de la cola, que no importan main)
+# python-dotenv solo se importa si hay un .env que cargar (arranque en frío de los pods)
+if os.path.exists(".env") or os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+log = get_logger("generation")
+
+# El SDK de openai se importa en la primera petición síncrona que lo necesita
+# La clave solo se lee del entorno (o del .env); sin ella las generaciones fallan con un error claro
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+if not OPENAI_API_KEY:
+    log.warning("OPENAI_API_KEY no está configurada: las generaciones con OpenAI fallarán")
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+
+TEMPERATURE = 0.7
+MAX_TOKENS = 3000
+# Peticiones de continuación permitidas cuando la respuesta se corta por max_tokens
+MAX_CONTINUATIONS = int(os.environ.get('GENSITE_MAX_CONTINUATIONS', '2'))
+# Cambiar cuando se modifique SYSTEM_MESSAGE para invalidar la caché de generaciones
+SYSTEM_MESSAGE_VERSION = "1"
+SUCCESS_MESSAGE = "Archivos generados exitosamente"
+
+
+class ConfigurationError(RuntimeError):
+    """Clave de API ausente o rechazada por el proveedor: el error es permanente"""
+
+
+SYSTEM_MESSAGE = '''You are an expert, senior web developer and React architect. Your job is to generate a complete, real, production-ready, professional React project based on the user's description.
+        - Carefully analyze the user's prompt and deliver a real, high-quality, fully functional project structure, as if you were delivering it to a real client or for a real business.
+        - The project must be usable, visually attractive, and ready for deployment.
+        - Include ALL essential files: index.html, index.tsx, App.tsx, package.json (with all necessary dependencies for a real project), styles (CSS or MUI), components (in folders if needed), assets (images as placeholders if referenced), and any other file needed for a real React app.
+        - Use TypeScript for all code files.
+        - Use best practices: modular components, clear folder structure, reusable code, and professional naming.
+        - If the user requests a portfolio, deliver a real, multi-section portfolio; if a landing page, deliver a real, modern landing, etc. Never return a minimal or test project.
+        - Do NOT include explanations, markdown, or comments in the output. Only return the JSON object with the files.
+        - The code must be ready to run and preview, with all imports and references correct.
+        - The JSON object must have this structure:
+        {
+          "App.tsx": {"content": "...", "language": "typescript"},
+          "index.tsx": {"content": "...", "language": "typescript"},
+          "index.html": {"content": "...", "language": "html"},
+          "package.json": {"content": "...", "language": "json"},
+          ...
+        }
+        - Do not include explanations, markdown, or any text outside the JSON object. Only output the JSON object with the files.'''
+
+
+# Proyecto React mínimo válido usado cuando la respuesta no se puede interpretar
+MINIMAL_PROJECT = {
+    "index.html": {"content": "<div id='root'></div>", "language": "html"},
+    "index.tsx": {"content": "import React from 'react';\nimport { createRoot } from 'react-dom/client';\nimport App from './App';\nimport './styles.css';\n\ncreateRoot(document.getElementById('root')).render(<App />);", "language": "typescript"},
+    "App.tsx": {"content": "import React from 'react';\nexport default function App() {\n  return <h1>Proyecto React mínimo generado automáticamente</h1>;\n}", "language": "typescript"},
+    "styles.css": {"content": "body { font-family: sans-serif; background: #f5f5f5; margin: 0; padding: 0; }", "language": "css"},
+    "package.json": {"content": "{\n  \"name\": \"react-minimal\",\n  \"version\": \"1.0.0\",\n  \"main\": \"index.tsx\"\n}", "language": "json"}
+}
+
+
+def model_name() -> str:
+    return os.environ.get('GENSITE_MODEL', 'gpt-4')
+
+
+def model_config():
+    """Devuelve (modelo, api_base, api_key) según GENSITE_MODEL"""
+    model = model_name()
+    if model == 'deepseek-coder':
+        api_base = 'https://api.deepseek.com/v1'
+        api_key, variable = os.environ.get('DEEPSEEK_API_KEY', ''), 'DEEPSEEK_API_KEY'
+    else:
+        api_base = OPENAI_API_BASE
+        api_key, variable = OPENAI_API_KEY, 'OPENAI_API_KEY'
+    if not api_key:
+        raise ConfigurationError(f"{variable} no está configurada")
+    return model, api_base, api_key
+
+
+def build_messages(prompt: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": f"Generate a complete, real, production-ready React project for: {prompt}"}
+    ]
+
+
+def build_result(files) -> Dict:
+    """Valida los archivos generados y devuelve el resultado final"""
+    try:
+        # Validación: debe ser un dict y contener al menos App.tsx y index.html
+        if not isinstance(files, dict) or not any(k.lower() == 'app.tsx' for k in files.keys()) or not any(k.lower() == 'index.html' for k in files.keys()):
+            raise ValueError('Archivos esenciales faltantes')
+        # Si falta styles.css, agrégalo vacío
+        if 'styles.css' not in files:
+            files['styles.css'] = {"content": "", "language": "css"}
+        GENERATION_RESULTS.labels(outcome="success").inc()
+        return {"files": files, "message": SUCCESS_MESSAGE}
+    except Exception as e:
+        log.warning("No se pudo interpretar el JSON de archivos", error=str(e))
+        GENERATION_RESULTS.labels(outcome="fallback").inc()
+        return {"files": {name: dict(info) for name, info in MINIMAL_PROJECT.items()}, "message": "Se generó un proyecto mínimo por error de formato."}
+
+
+def error_result(e: Exception) -> Dict:
+    log.error("Error generando el código", error=str(e))
+    GENERATION_RESULTS.labels(outcome="error").inc()
+    result = {
+        "files": {"App.tsx": {"content": f"// Error generando el código\n// {str(e)}", "language": "typescript"}},
+        "message": f"Error: {str(e)}",
+        "error": str(e)
+    }
+    if isinstance(e, ConfigurationError):
+        result["permanent"] = True
+    return result
+
+
+def continuation_messages(prompt: str, files: Dict) -> List[Dict]:
+    """Mensajes para pedir los archivos que faltan tras una respuesta truncada"""
+    done = ", ".join(files.keys()) or "none"
+    return build_messages(prompt) + [
+        {"role": "user", "content": (
+            "Your previous answer was cut off before the JSON object was complete. "
+            f"These files are already complete and must NOT be repeated: {done}. "
+            "Return a new JSON object, with the same structure, containing only the remaining files "
+            "(including any file that was cut off)."
+        )}
+    ]
+
+
+def extract_generated(generated: str) -> Tuple[Dict, bool]:
+    """Extrae los archivos completos de la respuesta; indica si estaba truncada"""
+    log.info("Respuesta del modelo recibida", response=payload_ref(generated))
+    with tracer.span("parse", chars=len(generated)):
+        files, truncated = extract_files(generated)
+    log.info("Archivos extraídos", files=list(files.keys()), truncated=truncated)
+    return files, truncated
+
+
+def merge_files(files: Dict, new_files: Dict) -> Dict:
+    # Los archivos ya completos tienen prioridad sobre los repetidos
+    added = {name: info for name, info in new_files.items() if name not in files}
+    files.update(added)
+    return added
+
+
+def _sync_complete(model: str, api_base: str, api_key: str, messages: List[Dict]) -> str:
+    started = time.perf_counter()
+    try:
+        generated, usage = _sync_request(model, api_base, api_key, messages)
+    except Exception:
+        PROVIDER_ERRORS.labels(model=model).inc()
+        raise
+    PROVIDER_LATENCY.labels(model=model, stream="false").observe(time.perf_counter() - started)
+    record_usage(model, usage)
+    return generated
+
+
+def _sync_request(model: str, api_base: str, api_key: str, messages: List[Dict]) -> Tuple[str, Optional[Dict]]:
+    if model == 'deepseek-coder':
+        import requests
+        headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+        }
+        payload = {
+            "model": "deepseek-coder",
+            "messages": messages,
+            "temperature": TEMPERATURE,
+            "max_tokens": MAX_TOKENS
+        }
+        response = requests.post(f"{api_base}/chat/completions", headers=headers, json=payload)
+        if response.status_code in (401, 403):
+            raise ConfigurationError(f"DEEPSEEK_API_KEY rechazada por el proveedor ({response.status_code})")
+        response.raise_for_status()
+        body = response.json()
+        return body["choices"][0]["message"]["content"].strip(), body.get("usage")
+    import openai
+    try:
+        response = openai.ChatCompletion.create(
+            model=model,
+            messages=messages,
+            api_key=api_key,
+            api_base=api_base,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS
+        )
+    except (openai.error.AuthenticationError, openai.error.PermissionError) as e:
+        raise ConfigurationError(f"OPENAI_API_KEY rechazada por el proveedor: {e}") from e
+    return response["choices"][0]["message"]["content"].strip(), response.get("usage")
+
+
+def sync_generate_code(prompt: str) -> Dict:
+    try:
+        # Selección de modelo
+        model, api_base, api_key = model_config()
+        log.info("Modelo seleccionado", model=model, mode="batch")
+        files, truncated = extract_generated(_sync_complete(model, api_base, api_key, build_messages(prompt)))
+        for _ in range(MAX_CONTINUATIONS):
+            if not truncated:
+                break
+            log.warning("Respuesta truncada, pidiendo los archivos restantes", completed_files=len(files))
+            more, truncated = extract_generated(_sync_complete(model, api_base, api_key, continuation_messages(prompt, files)))
+            if not merge_files(files, more):
+                break
+        return build_result(files if files else None)
+    except Exception as e:
+        return error_result(e)
+
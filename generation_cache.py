@@ -0,0 +1,154 @@
+"""
+Módulo de caché para los proyectos generados por la IA
+
+Funcionalidades:
+- Clave por contenido: hash de modelo, versión del mensaje de sistema, prompt normalizado y temperatura
+- Caché LRU acotada en memoria delante de un almacén en disco
+- Expulsión en disco por tamaño total (los archivos menos usados primero)
+- Contadores de aciertos y fallos (snapshot(), para /api/stats/cache y /metrics)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normaliza solo los espacios para que prompts equivalentes compartan entrada.
+    Las mayúsculas se respetan: cambian textos, nombres y marcas del proyecto.
+    """
+    return " ".join(prompt.split())
+
+
+def cache_key(model: str, system_version: str, prompt: str, temperature: float) -> str:
+    """Calcula la clave de caché de una generación"""
+    raw = json.dumps([model, system_version, normalize_prompt(prompt), temperature])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Caché de dos niveles (memoria + disco) para resultados de generación"""
+
+    def __init__(self, directory: str = ".gensite_cache", max_entries: int = 256,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._disk_sizes: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_disk_index(self):
+        """Recorre el directorio una sola vez para conocer el tamaño ocupado"""
+        if self._disk_sizes is not None:
+            return
+        entries = []
+        if os.path.isdir(self.directory):
+            for foldername, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if filename.endswith(".json"):
+                        stat = os.stat(os.path.join(foldername, filename))
+                        entries.append((stat.st_mtime, filename[:-5], stat.st_size))
+        entries.sort()
+        self._disk_sizes = OrderedDict((key, size) for _, key, size in entries)
+
+    def _remember(self, key: str, result: Dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, key: str) -> Optional[Dict]:
+        """Busca solo en memoria (sin E/S, apto para el event loop)"""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+            return result
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Busca en memoria y después en disco"""
+        result = self.get_memory(key)
+        if result is not None:
+            return result
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self._load_disk_index()
+            if key in self._disk_sizes:
+                self._disk_sizes.move_to_end(key)
+            self._remember(key, result)
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+        return result
+
+    def put(self, key: str, result: Dict):
+        """Guarda el resultado en memoria y en disco (escritura atómica)"""
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._remember(key, result)
+            self._load_disk_index()
+            self._disk_sizes[key] = len(data)
+            self._disk_sizes.move_to_end(key)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        total = sum(self._disk_sizes.values())
+        while total > self.max_disk_bytes and len(self._disk_sizes) > 1:
+            key, size = self._disk_sizes.popitem(last=False)
+            total -= size
+            self.stats["evictions"] += 1
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def snapshot(self) -> Dict:
+        """Copia de los contadores con la tasa de aciertos y la ocupación actual"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": sum(self._disk_sizes.values()) if self._disk_sizes is not None else None,
+            }
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        """Versión asíncrona: la lectura de disco se hace fuera del event loop"""
+        result = self.get_memory(key)
+        if result is not None:
+            return result
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, result: Dict):
+        await asyncio.to_thread(self.put, key, result)
@@ -0,0 +1,91 @@
+"""
+Módulo de presupuesto de tiempo de arranque
+
+Funcionalidades:
+- Mide el tiempo de importación de los módulos de entrada (por defecto main)
+  con python -X importtime, en procesos nuevos y quedándose con la mejor medida
+- Falla (código de salida 1) si se supera el presupuesto en milisegundos o si
+  algún SDK que debe cargarse bajo demanda se importa al arrancar
+- Muestra las dependencias directas más lentas para localizar la regresión
+
+Uso:
+    python import_budget.py [--budget-ms 800] [--runs 5] [modulo ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+# SDK que solo se importan en la primera operación que los necesita
+LAZY_MODULES = ("openai", "httpx", "h2", "supabase", "supabase_handler", "stripe", "paypalcheckoutsdk",
+                "selenium", "zapv2")
+
+DEFAULT_BUDGET_MS = float(os.environ.get("GENSITE_IMPORT_BUDGET_MS", "800"))
+
+
+def measure(module: str) -> Tuple[float, Dict[str, float], Set[str]]:
+    """
+    Importa el módulo en un intérprete nuevo. Devuelve (ms totales, ms de cada
+    dependencia directa, paquetes importados).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}:\n{result.stderr.strip().splitlines()[-1]}")
+    total = 0.0
+    children: Dict[str, float] = {}
+    imported: Set[str] = set()
+    # Cada módulo aparece después de sus dependencias; el bloque de un módulo de
+    # primer nivel son las líneas anidadas desde el anterior de primer nivel
+    block: List[Tuple[int, str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        name = name.strip()
+        if depth > 0:
+            block.append((depth, name, int(cumulative) / 1000))
+            continue
+        if name == module:
+            total = int(cumulative) / 1000
+            for child_depth, child, milliseconds in block:
+                imported.add(child.split(".")[0])
+                if child_depth == 1:
+                    children[child] = milliseconds
+        block = []
+    return total, children, imported
+
+
+def check(modules: List[str], budget_ms: float, runs: int) -> int:
+    failed = False
+    for module in modules:
+        try:
+            samples = [measure(module) for _ in range(max(runs, 1))]
+        except RuntimeError as e:
+            print(e)
+            return 2
+        total, children, imported = min(samples, key=lambda sample: sample[0])
+        print(f"{module}: {total:.1f} ms (presupuesto {budget_ms:.0f} ms, mejor de {len(samples)})")
+        for name, milliseconds in sorted(children.items(), key=lambda item: -item[1])[:10]:
+            print(f"  {milliseconds:8.1f} ms  {name}")
+        eager = sorted(imported.intersection(LAZY_MODULES))
+        if eager:
+            print(f"  ERROR: se importan al arrancar: {', '.join(eager)}")
+            failed = True
+        if total > budget_ms:
+            print(f"  ERROR: {module} supera el presupuesto en {total - budget_ms:.1f} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de GENSITE")
+    parser.add_argument("modules", nargs="*", default=["main"])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(check(args.modules, args.budget_ms, args.runs))
@@ -0,0 +1,205 @@
+"""
+Módulo de detección de intenciones en los mensajes del usuario
+
+Funcionalidades:
+- Compila la tabla intención -> palabras clave en una única expresión regular
+  con límites de palabra: un solo recorrido del texto para todas las intenciones
+  ("hi" ya no coincide dentro de "archivo")
+- Los infinitivos admiten pronombres enclíticos ("cambiarlo", "hacerme")
+- Devuelve las intenciones ordenadas por número de coincidencias, con la
+  posición de cada coincidencia en el texto original
+- API por lotes que clasifica muchos mensajes con una sola búsqueda
+- Micro-benchmark frente al recorrido anterior: python intent_matcher.py
+"""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+# Pronombres que se pegan al infinitivo: "cambiarlo" y "hacerme" cuentan como "cambiar" y "hacer"
+_ENCLITICS = r"(?:me|te|se|nos|os|lo|la|los|las|le|les){0,2}"
+_INFINITIVE_ENDINGS = ("ar", "er", "ir")
+_SEPARATOR = "\n"
+
+Table = Dict[str, List[str]]
+
+# Tabla de intenciones del asistente, en orden de prioridad
+INTENCIONES: Table = {
+    'generar': ['crear', 'hacer', 'generar', 'construir', 'crea', 'haz', 'genera', 'construye'],
+    'modificar': ['cambiar', 'editar', 'ajustar', 'modificar', 'cambia', 'edita', 'ajusta', 'modifica'],
+    'consultar': ['preguntar', 'consultar', 'saber', 'información']
+}
+SALUDOS = ['hola', 'hi', 'buenos']
+DESPEDIDAS = ['adiós', 'chao', 'gracias']
+
+
+class IntentMatch(NamedTuple):
+    """Intención detectada: número de coincidencias y sus posiciones (inicio, fin)"""
+    intent: str
+    score: int
+    spans: List[Tuple[int, int]]
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Alternativa de las palabras factorizada por prefijos comunes: el motor de
+    expresiones regulares descarta cada posición mirando un solo carácter
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Si aquí termina una palabra, el resto es opcional (y voraz: gana la más larga)
+        if "" in node:
+            return body + "?" if len(branches) == 1 and len(branches[0]) == 1 else f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """
+    Clasificador compilado a partir de una tabla {intención: [palabras]}.
+    El orden de la tabla es la prioridad para deshacer empates.
+    """
+
+    def __init__(self, table: Table):
+        self.intents = list(table)
+        # palabra -> intenciones que la usan
+        self._owners: Dict[str, List[int]] = {}
+        for index, keywords in enumerate(table.values()):
+            for keyword in keywords:
+                if keyword:
+                    self._owners.setdefault(keyword.lower(), []).append(index)
+        words = _trie_pattern(self._owners) if self._owners else r"(?!)"
+        pattern = rf"(?<!\w)({words})({_ENCLITICS})(?!\w)"
+        self._regex = re.compile(pattern)
+        # Para textos cuya longitud cambia al pasar a minúsculas (las posiciones no cuadrarían)
+        self._regex_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+    def _finditer(self, text: str) -> Iterator[Tuple[int, int, List[int]]]:
+        """(inicio, fin, intenciones) de cada palabra clave del texto"""
+        lowered = text.lower()
+        matches = (self._regex.finditer(lowered) if len(lowered) == len(text)
+                   else self._regex_ignorecase.finditer(text))
+        for m in matches:
+            keyword, enclitics = m.groups()
+            keyword = keyword.lower()
+            if enclitics and not keyword.endswith(_INFINITIVE_ENDINGS):
+                # "hilo" no es "hi" + "lo"
+                continue
+            yield m.start(), m.end(), self._owners[keyword]
+
+    def _rank(self, found: Dict[int, List[Tuple[int, int]]]) -> List[IntentMatch]:
+        if not found:
+            return []
+        ranked = sorted(found.items(), key=lambda item: (-len(item[1]), item[0]))
+        return [IntentMatch(self.intents[index], len(spans), spans) for index, spans in ranked]
+
+    def match(self, text: str) -> List[IntentMatch]:
+        """Intenciones del texto, de mayor a menor número de coincidencias"""
+        found: Dict[int, List[Tuple[int, int]]] = {}
+        for start, end, owners in self._finditer(text):
+            for index in owners:
+                found.setdefault(index, []).append((start, end))
+        return self._rank(found)
+
+    def match_batch(self, texts: Iterable[str]) -> List[List[IntentMatch]]:
+        """
+        Clasifica varios mensajes con una sola búsqueda sobre el texto unido;
+        las posiciones son relativas a cada mensaje.
+        """
+        texts = list(texts)
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + len(_SEPARATOR)
+        found: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in texts]
+        message = 0
+        for start, end, owners in self._finditer(_SEPARATOR.join(texts)):
+            # Las coincidencias salen en orden: el mensaje solo puede avanzar
+            if message + 1 < len(offsets) and start >= offsets[message + 1]:
+                message = bisect_right(offsets, start, message) - 1
+            base = offsets[message]
+            for index in owners:
+                found[message].setdefault(index, []).append((start - base, end - base))
+        return [self._rank(matches) for matches in found]
+
+    def intents_in(self, text: str) -> List[str]:
+        """Nombres de las intenciones presentes, en el orden de prioridad de la tabla"""
+        present = {index for _, _, owners in self._finditer(text) for index in owners}
+        return [self.intents[index] for index in sorted(present)]
+
+
+@lru_cache(maxsize=32)
+def _compiled(key: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> IntentMatcher:
+    return IntentMatcher({intent: list(keywords) for intent, keywords in key})
+
+
+def matcher_for(table: Table) -> IntentMatcher:
+    """Clasificador de la tabla, compilado una vez mientras su contenido no cambie"""
+    return _compiled(tuple((intent, tuple(keywords)) for intent, keywords in table.items()))
+
+
+def detectar_intenciones(texto: str, intenciones: Table = INTENCIONES) -> List[str]:
+    """
+    Devuelve las intenciones presentes en el texto, en el orden de prioridad
+    de la tabla de intenciones
+    """
+    return matcher_for(intenciones).intents_in(texto)
+
+
+def clasificar_mensajes(textos: List[str], intenciones: Table = INTENCIONES) -> List[List[IntentMatch]]:
+    """Intenciones de varios mensajes a la vez, ordenadas por número de coincidencias"""
+    return matcher_for(intenciones).match_batch(textos)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def legacy(texto: str, intenciones: Table) -> List[str]:
+        """Recorrido anterior: subcadenas en minúsculas, una palabra tras otra"""
+        texto = texto.lower()
+        return [intencion for intencion, palabras in intenciones.items()
+                if any(palabra in texto for palabra in palabras)]
+
+    prompts = (
+        "quiero una landing page para mi restaurante con menú y reservas online",
+        "puedes cambiar el color del header a azul oscuro",
+        "hola, necesito crear una tienda para vender ropa deportiva con carrito",
+        "el archivo App.tsx tiene un error en la línea 20, revisa el footer",
+        "agrega una sección de testimonios y una galería de fotos",
+        "gracias, quiero saber cuánto cuesta publicarlo",
+    )
+    rng = random.Random(7)
+    messages = [rng.choice(prompts) for _ in range(50000)]
+    table = {'saludo': SALUDOS, 'despedida': DESPEDIDAS, **INTENCIONES}
+    # Tabla diez veces mayor (sinónimos inventados) para ver cómo escala cada enfoque
+    large = {f"{intent}{n}": [f"{word}{n}" for word in words] for n in range(10) for intent, words in table.items()}
+    large.update(table)
+
+    def timed(label: str, run):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<26} {len(messages) / elapsed:>12,.0f} mensajes/s")
+
+    for name, benchmark_table in (("tabla actual", table), ("tabla x10", large)):
+        matcher = matcher_for(benchmark_table)
+        print(f"{name} ({sum(map(len, benchmark_table.values()))} palabras, {len(messages)} mensajes)")
+        timed("bucle anterior", lambda: [legacy(message, benchmark_table) for message in messages])
+        timed("regex compilada", lambda: [matcher.intents_in(message) for message in messages])
+        timed("regex con posiciones", lambda: [matcher.match(message) for message in messages])
+        timed("lote con posiciones", lambda: matcher.match_batch(messages))
+    print("'hi' en 'abre el archivo':", legacy("abre el archivo", {'saludo': ['hi']}),
+          "->", matcher_for({'saludo': ['hi']}).intents_in("abre el archivo"))
@@ -0,0 +1,287 @@
+"""
+Módulo de cola de trabajos de generación persistente
+
+Funcionalidades:
+- Cola local duradera en SQLite: los trabajos sobreviven a reinicios del servidor
+- Procesos worker independientes que ejecutan generation.sync_generate_code y guardan
+  el resultado (sin importar main ni FastAPI)
+- Reparto atómico de trabajos entre workers y reintento de los que quedaron a medias
+  (un worker caído deja de renovar su lease y el trabajo vuelve a la cola); los
+  errores de configuración, como una clave de API ausente o rechazada, no se reintentan
+- Seguimiento del progreso desde la API para notificarlo por WebSocket
+
+Los workers se lanzan aparte y escalan por separado de los procesos de la API:
+    python job_queue.py --workers 4
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from structured_logging import get_logger
+
+log = get_logger("job_queue")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    client_id TEXT,
+    prompt TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """
+    Acceso a la tabla de trabajos. Cada hilo usa su propia conexión SQLite
+    (modo WAL), así que se puede llamar desde asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def submit(self, prompt: str, client_id: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, client_id, prompt, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, client_id, prompt, QUEUED, now, now),
+        )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Toma el trabajo en cola más antiguo (o uno cuyo lease caducó)"""
+        db = self._connect()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Trabajos de workers caídos: se reintentan o se dan por fallidos
+            db.execute(
+                "UPDATE jobs SET status = ?, error = 'demasiados intentos', updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, self.max_attempts),
+            )
+            db.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, updated_at = ? WHERE status = ? AND lease_until < ?",
+                (QUEUED, now, RUNNING, now),
+            )
+            row = db.execute(
+                "SELECT id, client_id, prompt, attempts FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ?, lease_until = ? "
+                    "WHERE id = ?",
+                    (RUNNING, worker, now, now + self.lease_seconds, row["id"]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def renew(self, job_id: str, worker: str):
+        self._connect().execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time() + self.lease_seconds, job_id, worker, RUNNING),
+        )
+
+    def finish(self, job_id: str, worker: str, result: Dict[str, Any]):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, updated_at = ?, lease_until = NULL WHERE id = ? AND worker = ?",
+            (DONE, json.dumps(result), time.time(), job_id, worker),
+        )
+
+    def fail(self, job_id: str, worker: str, error: str, permanent: bool = False):
+        """
+        Vuelve a poner el trabajo en cola, o lo da por fallido si agotó los
+        intentos o el error es permanente
+        """
+        max_attempts = 0 if permanent else self.max_attempts
+        self._connect().execute(
+            "UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, worker = NULL, error = ?, "
+            "updated_at = ?, lease_until = NULL WHERE id = ? AND worker = ?",
+            (max_attempts, QUEUED, FAILED, error, time.time(), job_id, worker),
+        )
+
+    def get(self, job_id: str, with_result: bool = True) -> Optional[Dict[str, Any]]:
+        columns = "id, client_id, status, attempts, error, created_at, updated_at" + (", result" if with_result else "")
+        row = self._connect().execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job.get("result") is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def statuses(self, job_ids: Iterable[str]) -> Dict[str, str]:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._connect().execute(f"SELECT id, status FROM jobs WHERE id IN ({placeholders})", job_ids)
+        return {row["id"]: row["status"] for row in rows}
+
+    def stats(self) -> Dict[str, int]:
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+
+class JobWatcher:
+    """
+    Sigue desde la API el estado de los trabajos a los que hay clientes suscritos.
+    Una sola consulta periódica cubre todas las suscripciones.
+    notify(client_id, job) se llama en cada cambio de estado.
+    """
+
+    def __init__(self, store: JobStore, notify: Callable[[str, Dict[str, Any]], Any], interval: float = 0.5):
+        self.store = store
+        self.notify = notify
+        self.interval = interval
+        self.subscriptions: Dict[str, set] = {}
+        self._last_status: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, job_id: str, client_id: str):
+        self.subscriptions.setdefault(job_id, set()).add(client_id)
+        # Fuerza una notificación del estado actual al nuevo suscriptor
+        self._last_status.pop(job_id, None)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self.subscriptions:
+            try:
+                statuses = await asyncio.to_thread(self.store.statuses, list(self.subscriptions))
+                for job_id, status in statuses.items():
+                    if self._last_status.get(job_id) == status:
+                        continue
+                    self._last_status[job_id] = status
+                    finished = status in (DONE, FAILED)
+                    job = await asyncio.to_thread(self.store.get, job_id, finished)
+                    for client_id in list(self.subscriptions.get(job_id, ())):
+                        await self.notify(client_id, job)
+                    if finished:
+                        self.subscriptions.pop(job_id, None)
+                        self._last_status.pop(job_id, None)
+                for job_id in set(self.subscriptions) - set(statuses):
+                    self.subscriptions.pop(job_id, None)
+            except sqlite3.Error as e:
+                log.warning("No se pudo consultar la cola de trabajos", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def store_from_env() -> JobStore:
+    return JobStore(
+        os.environ.get("GENSITE_JOBS_DB", ".gensite_jobs.sqlite3"),
+        lease_seconds=float(os.environ.get("GENSITE_JOB_LEASE", "600")),
+        max_attempts=int(os.environ.get("GENSITE_JOB_MAX_ATTEMPTS", "3")),
+    )
+
+
+def run_worker(poll_interval: float = 1.0):
+    """Bucle de un proceso worker: toma trabajos y ejecuta sync_generate_code"""
+    from generation import ConfigurationError, sync_generate_code
+
+    store = store_from_env()
+    worker = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    log.info("Worker de generación iniciado", worker=worker)
+    while True:
+        job = store.claim(worker)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        log.info("Trabajo iniciado", worker=worker, job_id=job["id"], attempt=job["attempts"] + 1)
+        stop = threading.Event()
+
+        def heartbeat(job_id=job["id"]):
+            while not stop.wait(store.lease_seconds / 3):
+                store.renew(job_id, worker)
+
+        renewer = threading.Thread(target=heartbeat, daemon=True)
+        renewer.start()
+        try:
+            result = sync_generate_code(job["prompt"])
+            if result.get("error"):
+                # sync_generate_code no lanza: devuelve un resultado de error
+                permanent = bool(result.get("permanent"))
+                store.fail(job["id"], worker, result["error"], permanent)
+                log.error("Trabajo fallido", worker=worker, job_id=job["id"], error=result["error"], permanent=permanent)
+                continue
+            store.finish(job["id"], worker, result)
+            log.info("Trabajo terminado", worker=worker, job_id=job["id"], message=result.get("message"))
+        except Exception as e:
+            permanent = isinstance(e, ConfigurationError)
+            store.fail(job["id"], worker, str(e), permanent)
+            log.error("Trabajo fallido", worker=worker, job_id=job["id"], error=str(e), permanent=permanent)
+        finally:
+            stop.set()
+
+
+def run_pool(workers: int) -> List:
+    """Lanza workers procesos independientes y espera a que terminen"""
+    import multiprocessing
+
+    processes = [multiprocessing.Process(target=run_worker, name=f"gensite-job-worker-{i}") for i in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    return processes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Workers de la cola de generaciones de GENSITE")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("GENSITE_JOB_WORKERS", "2")))
+    run_pool(parser.parse_args().workers)
@@ -0,0 +1,161 @@
+"""
+Módulo para el análisis incremental del JSON generado por el modelo
+
+Funcionalidades:
+- Recorre el texto del modelo a medida que llega (token a token)
+- Detecta cada entrada de primer nivel ("App.tsx": {...}) en cuanto se cierra
+- Ignora texto previo al objeto JSON (por ejemplo, bloques markdown)
+- Extracción en una sola pasada que recupera los archivos completos de una respuesta truncada
+"""
+import json
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class IncrementalFileParser:
+    """
+    Parser incremental del objeto JSON de archivos devuelto por el modelo.
+
+    Cada llamada a ``feed`` recibe un fragmento de texto y devuelve las
+    entradas de primer nivel que quedaron completas con ese fragmento.
+    El recorrido es de una sola pasada: cada carácter se inspecciona una vez.
+    Los fragmentos se guardan en una lista y solo se unen al extraer una clave
+    o un valor, así que acumular la respuesta no es cuadrático.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        # Posición absoluta del primer carácter de cada fragmento
+        self._starts: List[int] = []
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Estados dentro del objeto raíz: key, colon, value_expected, value, after_value
+        self._state = "key"
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start: Optional[int] = None
+        self._value_is_string = False
+        self.files: Dict[str, Any] = {}
+        self.started = False
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        """Texto completo recibido hasta el momento"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+            self._starts = [0]
+        return self._chunks[0] if self._chunks else ""
+
+    def _slice(self, start: int, stop: int) -> str:
+        """Texto entre dos posiciones absolutas, uniendo solo los fragmentos que abarca"""
+        first = bisect_right(self._starts, start) - 1
+        last = bisect_right(self._starts, stop - 1)
+        base = self._starts[first]
+        return "".join(self._chunks[first:last])[start - base:stop - base]
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Procesa un fragmento y devuelve las entradas completadas"""
+        if not chunk:
+            return []
+        offset = self._length
+        self._chunks.append(chunk)
+        self._starts.append(offset)
+        self._length += len(chunk)
+        if self.complete:
+            return []
+        emitted: List[Tuple[str, Any]] = []
+        # Las posiciones guardadas (_key_start, _value_start) son absolutas: offset + i
+        i = 0
+        end = len(chunk)
+        while i < end:
+            c = chunk[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._state == "key":
+                            try:
+                                self._key = json.loads(self._slice(self._key_start, offset + i + 1))
+                            except ValueError:
+                                self._key = None
+                            self._state = "colon"
+                        elif self._state == "value" and self._value_is_string:
+                            self._emit(self._value_start, offset + i + 1, emitted)
+                i += 1
+                continue
+
+            if self._depth == 0:
+                # Antes del objeto raíz se ignora todo salvo la llave de apertura
+                if c == "{":
+                    self._depth = 1
+                    self._state = "key"
+                    self.started = True
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._state == "key":
+                        self._key_start = offset + i
+                    elif self._state == "value_expected":
+                        self._start_value(offset + i, True)
+            elif c in "{[":
+                if self._depth == 1 and self._state == "value_expected":
+                    self._start_value(offset + i, False)
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._state == "value":
+                    self._emit(self._value_start, offset + i + 1, emitted)
+                elif self._depth == 0:
+                    if self._state == "value":
+                        self._emit(self._value_start, offset + i, emitted)
+                    self.complete = True
+                    break
+            elif self._depth == 1:
+                if c == ":" and self._state == "colon":
+                    self._state = "value_expected"
+                elif c == ",":
+                    if self._state == "value":
+                        self._emit(self._value_start, offset + i, emitted)
+                    self._state = "key"
+                elif not c.isspace() and self._state == "value_expected":
+                    # Valor primitivo (número, true, false, null)
+                    self._start_value(offset + i, False)
+            i += 1
+        return emitted
+
+    def _start_value(self, start: int, is_string: bool):
+        self._value_start = start
+        self._value_is_string = is_string
+        self._state = "value"
+
+    def _emit(self, start: int, stop: int, emitted: List[Tuple[str, Any]]):
+        self._state = "after_value"
+        self._value_start = None
+        if self._key is None:
+            return
+        try:
+            value = json.loads(self._slice(start, stop))
+        except ValueError:
+            return
+        self.files[self._key] = value
+        emitted.append((self._key, value))
+
+
+def extract_files(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Extrae el primer objeto JSON de archivos del texto del modelo.
+
+    Devuelve (archivos, truncado): si la respuesta se cortó (por ejemplo al
+    alcanzar max_tokens) se devuelven igualmente todas las entradas completas
+    y truncado es True.
+    """
+    parser = IncrementalFileParser()
+    parser.feed(text)
+    return parser.files, parser.started and not parser.complete
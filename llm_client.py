@@ -0,0 +1,152 @@
+"""
+Módulo cliente asíncrono para los proveedores de IA (OpenAI, Deepseek)
+
+Funcionalidades:
+- Un cliente HTTP compartido por proveedor, con conexiones keep-alive reutilizables
+- HTTP/2 cuando el paquete h2 está disponible
+- httpx (y la comprobación de h2) se importan al crear el primer cliente, no al arrancar
+- Completions normales y en streaming (SSE) sin pasar por el thread pool
+"""
+import json
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from metrics import PROVIDER_ERRORS, PROVIDER_LATENCY, PROVIDER_TTFB, record_usage
+from tracing import tracer
+
+if TYPE_CHECKING:
+    import httpx
+
+
+@lru_cache(maxsize=None)
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ProviderClient:
+    """Cliente asíncrono para un endpoint compatible con la API de chat de OpenAI"""
+
+    def __init__(self, api_base: str, api_key: str, max_connections: int = 100,
+                 max_keepalive: int = 20, timeout: float = 120.0):
+        self.api_base = api_base.rstrip('/')
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Crea el cliente HTTP en el primer uso y lo reutiliza después"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                http2=http2_available(),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_keepalive),
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                headers={
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Content-Type': 'application/json',
+                },
+            )
+        return self._client
+
+    async def complete(self, model: str, messages: List[Dict], temperature: float = 0.7,
+                       max_tokens: int = 3000) -> str:
+        """Devuelve el contenido completo de la respuesta del modelo"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        started = time.perf_counter()
+        with tracer.span("provider", model=model, stream=False):
+            try:
+                response = await self.client.post("/chat/completions", json=payload)
+                response.raise_for_status()
+                body = response.json()
+            except Exception:
+                PROVIDER_ERRORS.labels(model=model).inc()
+                raise
+        PROVIDER_LATENCY.labels(model=model, stream="false").observe(time.perf_counter() - started)
+        record_usage(model, body.get("usage"))
+        return body["choices"][0]["message"]["content"].strip()
+
+    async def stream(self, model: str, messages: List[Dict], temperature: float = 0.7,
+                     max_tokens: int = 3000) -> AsyncIterator[str]:
+        """Itera sobre los fragmentos de texto del stream SSE del proveedor"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+            # El último fragmento del stream trae el campo usage con los tokens consumidos
+            "stream_options": {"include_usage": True},
+        }
+        # Los spans se abren sin volverse "actuales" porque este generador cede el control
+        provider_span = tracer.start_span("provider", model=model, stream=True)
+        ttfb_span = tracer.start_span("provider_ttfb", model=model)
+        started = time.perf_counter()
+        first_token = True
+        try:
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    record_usage(model, chunk.get("usage"))
+                    if not chunk.get("choices"):
+                        continue
+                    delta = chunk["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        if first_token:
+                            first_token = False
+                            PROVIDER_TTFB.labels(model=model).observe(time.perf_counter() - started)
+                            if ttfb_span is not None:
+                                ttfb_span.end()
+                        yield delta["content"]
+            PROVIDER_LATENCY.labels(model=model, stream="true").observe(time.perf_counter() - started)
+        except Exception:
+            PROVIDER_ERRORS.labels(model=model).inc()
+            raise
+        finally:
+            if provider_span is not None:
+                ttfb_span.end()
+                provider_span.end()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_clients: Dict[str, ProviderClient] = {}
+
+
+def get_client(api_base: str, api_key: str) -> ProviderClient:
+    """Devuelve el cliente compartido para el proveedor indicado"""
+    key = f"{api_base}|{api_key}"
+    if key not in _clients:
+        _clients[key] = ProviderClient(api_base, api_key)
+    return _clients[key]
+
+
+async def close_clients():
+    """Cierra todas las conexiones abiertas (al apagar la aplicación)"""
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,119 @@
+"""
+Módulo de métricas Prometheus de GENSITE
+
+Funcionalidades:
+- Conexiones WebSocket activas por gestor de conexiones
+- Generaciones en curso y en cola
+- Latencia del proveedor de IA por modelo y tokens consumidos
+- Resultado de cada generación (éxito, proyecto mínimo de respaldo, error)
+- Latencia y tamaño de las respuestas de la API de archivos
+- Contadores que ya llevan otros módulos (por ejemplo, aciertos de la caché de
+  generaciones), leídos en cada consulta a /metrics
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "gensite_websocket_connections",
+    "Conexiones WebSocket activas",
+    ["manager"],
+)
+GENERATIONS_IN_FLIGHT = Gauge(
+    "gensite_generations_in_flight",
+    "Generaciones que están llamando al proveedor",
+)
+GENERATIONS_QUEUED = Gauge(
+    "gensite_generations_queued",
+    "Generaciones esperando turno en el planificador",
+)
+PROVIDER_LATENCY = Histogram(
+    "gensite_provider_latency_seconds",
+    "Duración total de las llamadas al proveedor de IA",
+    ["model", "stream"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180),
+)
+PROVIDER_TTFB = Histogram(
+    "gensite_provider_ttfb_seconds",
+    "Tiempo hasta el primer token en las llamadas en streaming",
+    ["model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20),
+)
+PROVIDER_ERRORS = Counter(
+    "gensite_provider_errors_total",
+    "Llamadas al proveedor que terminaron con error",
+    ["model"],
+)
+TOKENS = Counter(
+    "gensite_tokens_total",
+    "Tokens consumidos en el proveedor de IA",
+    ["model", "kind"],
+)
+GENERATION_RESULTS = Counter(
+    "gensite_generation_results_total",
+    "Resultado de las generaciones (success, fallback, error)",
+    ["outcome"],
+)
+FILES_API_LATENCY = Histogram(
+    "gensite_files_api_latency_seconds",
+    "Latencia de los endpoints de /api/files",
+    ["route"],
+)
+FILES_API_PAYLOAD = Histogram(
+    "gensite_files_api_payload_bytes",
+    "Tamaño de los datos recibidos o enviados por /api/files",
+    ["route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864),
+)
+
+
+def record_usage(model: str, usage):
+    """Registra los tokens del campo usage de la respuesta del proveedor"""
+    if not usage:
+        return
+    TOKENS.labels(model=model, kind="prompt").inc(usage.get("prompt_tokens", 0) or 0)
+    TOKENS.labels(model=model, kind="completion").inc(usage.get("completion_tokens", 0) or 0)
+
+
+@contextmanager
+def observe_files_api(route: str):
+    """Mide la latencia de un endpoint de archivos"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        FILES_API_LATENCY.labels(route=route).observe(time.perf_counter() - started)
+
+
+class StatsCollector:
+    """Publica como contadores las claves elegidas de un diccionario de estadísticas"""
+
+    def __init__(self, name: str, documentation: str, label: str, stats: Callable[[], Dict],
+                 keys: Iterable[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.stats = stats
+        self.keys = tuple(keys)
+
+    def collect(self):
+        values = self.stats()
+        family = CounterMetricFamily(self.name, self.documentation, labels=[self.label])
+        for key in self.keys:
+            family.add_metric([key], values.get(key, 0))
+        yield family
+
+
+def register_stats(name: str, documentation: str, label: str, stats: Callable[[], Dict],
+                   keys: Iterable[str]) -> StatsCollector:
+    collector = StatsCollector(name, documentation, label, stats, keys)
+    REGISTRY.register(collector)
+    return collector
+
+
+def render_latest():
+    """Devuelve (contenido, content_type) para el endpoint /metrics"""
+    return generate_latest(), CONTENT_TYPE_LATEST
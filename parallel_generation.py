@@ -0,0 +1,122 @@
+"""
+Módulo de generación paralela de proyectos (planificar y repartir)
+
+Funcionalidades:
+- Pide al modelo un manifiesto compacto de archivos del proyecto
+- Genera cada archivo en paralelo (con un límite de concurrencia) compartiendo el manifiesto
+- Entrega cada archivo en cuanto termina, sin esperar a los demás
+"""
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Dict, List, Tuple
+
+from llm_client import ProviderClient
+from structured_logging import get_logger
+
+log = get_logger("parallel_generation")
+
+PLAN_SYSTEM_MESSAGE = '''You are an expert, senior web developer and React architect. Plan a complete, real, production-ready React + TypeScript project for the user's description.
+        - Do NOT write any code yet. Only return the list of files the project needs.
+        - Always include index.html, index.tsx, App.tsx, package.json and styles.css.
+        - Keep descriptions short (one sentence) and mention the components/exports each file provides.
+        - Return only a JSON object with this structure, without markdown or explanations:
+        {
+          "summary": "one paragraph describing the project, its sections and visual style",
+          "files": [
+            {"path": "App.tsx", "language": "typescript", "description": "..."},
+            ...
+          ]
+        }'''
+
+FILE_SYSTEM_MESSAGE = '''You are an expert, senior web developer and React architect. You are writing ONE file of a larger React + TypeScript project whose full file manifest is given below.
+        - Write the complete, production-ready content of the requested file only.
+        - Imports and references to other files must match the paths and exports in the manifest.
+        - Do NOT include explanations, markdown fences or any text outside the file content.'''
+
+ESSENTIAL_FILES = [
+    {"path": "index.html", "language": "html", "description": "HTML entry point with a #root element"},
+    {"path": "index.tsx", "language": "typescript", "description": "Mounts <App /> into #root and imports styles.css"},
+    {"path": "App.tsx", "language": "typescript", "description": "Root component composing the project sections"},
+    {"path": "package.json", "language": "json", "description": "Project metadata and dependencies"},
+    {"path": "styles.css", "language": "css", "description": "Global styles"},
+]
+
+_FENCE = re.compile(r'^```[\w+-]*\n([\s\S]*?)\n?```\s*$')
+
+
+def _parse_manifest(generated: str) -> Dict:
+    """Extrae el manifiesto del texto del modelo y garantiza los archivos esenciales"""
+    start, end = generated.find('{'), generated.rfind('}')
+    try:
+        manifest = json.loads(generated[start:end + 1]) if start != -1 else {}
+    except ValueError:
+        manifest = {}
+    files: List[Dict] = []
+    seen = set()
+    for entry in manifest.get("files", []) if isinstance(manifest, dict) else []:
+        if isinstance(entry, dict) and isinstance(entry.get("path"), str) and entry["path"] not in seen:
+            seen.add(entry["path"])
+            files.append({
+                "path": entry["path"],
+                "language": entry.get("language", "typescript"),
+                "description": entry.get("description", ""),
+            })
+    for entry in ESSENTIAL_FILES:
+        if entry["path"] not in seen:
+            files.append(dict(entry))
+    summary = manifest.get("summary", "") if isinstance(manifest, dict) else ""
+    return {"summary": summary, "files": files}
+
+
+def _strip_fences(content: str) -> str:
+    match = _FENCE.match(content.strip())
+    return match.group(1) if match else content
+
+
+async def plan_manifest(client: ProviderClient, model: str, prompt: str, temperature: float = 0.7) -> Dict:
+    """Pide al modelo el manifiesto de archivos del proyecto"""
+    generated = await client.complete(model, [
+        {"role": "system", "content": PLAN_SYSTEM_MESSAGE},
+        {"role": "user", "content": f"Plan a complete, real, production-ready React project for: {prompt}"}
+    ], temperature, 1000)
+    return _parse_manifest(generated)
+
+
+async def generate_file(client: ProviderClient, model: str, prompt: str, manifest: Dict, entry: Dict,
+                        temperature: float = 0.7, max_tokens: int = 3000) -> Tuple[str, Dict]:
+    """Genera el contenido de un archivo del manifiesto"""
+    listing = "\n".join(f"- {f['path']} ({f['language']}): {f['description']}" for f in manifest["files"])
+    content = await client.complete(model, [
+        {"role": "system", "content": FILE_SYSTEM_MESSAGE},
+        {"role": "user", "content": (
+            f"Project: {prompt}\n\nSummary: {manifest['summary']}\n\nManifest:\n{listing}\n\n"
+            f"Write the file {entry['path']} ({entry['description']})."
+        )}
+    ], temperature, max_tokens)
+    return entry["path"], {"content": _strip_fences(content), "language": entry["language"]}
+
+
+async def fan_out(client: ProviderClient, model: str, prompt: str, manifest: Dict, max_parallel: int = 4,
+                  temperature: float = 0.7, max_tokens: int = 3000) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Genera todos los archivos del manifiesto con como mucho max_parallel
+    llamadas simultáneas y los entrega en orden de finalización.
+    Los archivos que fallan se omiten.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def bounded(entry: Dict):
+        async with semaphore:
+            return await generate_file(client, model, prompt, manifest, entry, temperature, max_tokens)
+
+    tasks = [asyncio.create_task(bounded(entry)) for entry in manifest["files"]]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                yield await next_done
+            except Exception as e:
+                log.warning("Error generando un archivo", error=str(e))
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,108 @@
+"""
+Módulo para la edición incremental de proyectos ya generados
+
+Funcionalidades:
+- Construye la petición de cambios con el proyecto actual y la solicitud del usuario
+- Aplica reemplazos completos, diffs unificados y borrados por archivo
+- Devuelve solo los archivos que realmente cambiaron
+"""
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+EDIT_SYSTEM_MESSAGE = '''You are an expert, senior web developer and React architect. You are editing an existing React + TypeScript project.
+        - You receive the current project files and a change request.
+        - Only touch the files that need to change. Never return unchanged files.
+        - For each changed file return ONE of:
+          {"diff": "<unified diff hunks (@@ -a,b +c,d @@) against the current content>"} for small edits,
+          {"content": "<full new content>", "language": "..."} for new files or large rewrites,
+          {"delete": true} to remove a file.
+        - Return only a JSON object mapping file paths to those entries, without markdown or explanations:
+        {
+          "App.tsx": {"diff": "@@ -3,1 +3,1 @@\\n-old line\\n+new line"},
+          "components/Footer.tsx": {"content": "...", "language": "typescript"}
+        }'''
+
+_HUNK = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def build_edit_messages(files: Dict[str, Dict], request: str) -> List[Dict]:
+    """Mensajes para pedir al modelo los cambios sobre el proyecto actual"""
+    project = json.dumps({name: info.get("content", "") for name, info in files.items()}, ensure_ascii=False)
+    return [
+        {"role": "system", "content": EDIT_SYSTEM_MESSAGE},
+        {"role": "user", "content": f"Current project files (path -> content):\n{project}\n\nChange request: {request}"}
+    ]
+
+
+def _find_block(lines: List[str], block: List[str], hint: int, start: int) -> int:
+    """Busca el bloque de contexto, primero en la posición indicada por el hunk"""
+    size = len(block)
+    if hint >= start and lines[hint:hint + size] == block:
+        return hint
+    for i in range(start, len(lines) - size + 1):
+        if lines[i:i + size] == block:
+            return i
+    raise ValueError("El contexto del diff no coincide con el archivo actual")
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """Aplica los hunks de un diff unificado sobre el contenido original"""
+    hunks: List[Tuple[int, List[Tuple[str, str]]]] = []
+    for line in diff.splitlines():
+        match = _HUNK.match(line)
+        if match:
+            old_start, old_len = int(match.group(1)), match.group(2)
+            # En hunks de inserción pura (-n,0) las líneas nuevas van después de la línea n
+            hint = old_start if old_len == "0" else old_start - 1
+            hunks.append((max(hint, 0), []))
+        elif hunks and line[:1] in (" ", "-", "+") and not line.startswith(("--- ", "+++ ")):
+            hunks[-1][1].append((line[0], line[1:]))
+        elif hunks and line == "":
+            # Algunas respuestas omiten el espacio inicial en las líneas de contexto vacías
+            hunks[-1][1].append((" ", ""))
+    if not hunks:
+        raise ValueError("El diff no contiene hunks")
+
+    lines = original.splitlines()
+    result: List[str] = []
+    pos = 0
+    for hint, body in hunks:
+        old_block = [text for op, text in body if op in (" ", "-")]
+        new_block = [text for op, text in body if op in (" ", "+")]
+        start = _find_block(lines, old_block, hint, pos) if old_block else max(hint, pos)
+        result.extend(lines[pos:start])
+        result.extend(new_block)
+        pos = start + len(old_block)
+    result.extend(lines[pos:])
+    return "\n".join(result) + ("\n" if original.endswith("\n") else "")
+
+
+def apply_edit(files: Dict[str, Dict], filename: str, edit) -> Tuple[bool, Optional[Dict]]:
+    """
+    Aplica un cambio sobre el proyecto (in situ).
+
+    Devuelve (cambió, info): info es None cuando el archivo se borró.
+    """
+    if not isinstance(edit, dict):
+        raise ValueError(f"Cambio inválido para {filename}")
+    current = files.get(filename)
+    if edit.get("delete"):
+        if current is None:
+            return False, None
+        del files[filename]
+        return True, None
+    if "diff" in edit:
+        if current is None:
+            raise ValueError(f"No se puede aplicar un diff a {filename}: el archivo no existe")
+        content = apply_unified_diff(current.get("content", ""), edit["diff"])
+        language = current.get("language", "typescript")
+    elif isinstance(edit.get("content"), str):
+        content = edit["content"]
+        language = edit.get("language") or (current or {}).get("language", "typescript")
+    else:
+        raise ValueError(f"Cambio inválido para {filename}")
+    if current is not None and current.get("content") == content:
+        return False, current
+    files[filename] = {"content": content, "language": language}
+    return True, files[filename]
@@ -0,0 +1,31 @@
+"""
+Módulo de escritura de archivos del proyecto generado
+
+Funcionalidades:
+- Escritura atómica (archivo temporal + rename): nunca quedan archivos a medio escribir
+- Estados de escritura comunes a los espacios de trabajo y a la API de archivos
+"""
+import os
+import tempfile
+
+CREATED = "created"
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+ERROR = "error"
+
+
+def write_atomic(path: str, data: bytes):
+    """Escribe en un temporal del mismo directorio y lo renombra sobre el destino"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,119 @@
+"""
+Módulo planificador de generaciones
+
+Funcionalidades:
+- Límite global de generaciones concurrentes
+- Una cola por client_id, atendidas en round-robin para repartir de forma justa
+- Profundidad máxima de cola (por cliente y global) con rechazo explícito
+- Los turnos pendientes se retiran de la cola al cancelar la tarea que espera
+- Estadísticas de profundidad de cola y tiempo de espera
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+
+class SchedulerRejected(Exception):
+    """La cola está llena y la petición no se puede aceptar"""
+
+
+class Ticket:
+    """Turno de un cliente en el planificador"""
+
+    def __init__(self, scheduler: "GenerationScheduler", client_id: str, position: int):
+        self.scheduler = scheduler
+        self.client_id = client_id
+        self.position = position
+        self.submitted_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.released = False
+        self._future: asyncio.Future = asyncio.get_event_loop().create_future()
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    async def wait(self):
+        """Espera a que el planificador conceda el turno"""
+        await asyncio.shield(self._future)
+
+    def release(self):
+        """Libera el turno (o lo retira de la cola si aún no se concedió)"""
+        if self.released:
+            return
+        self.released = True
+        self.scheduler._release(self)
+
+
+class GenerationScheduler:
+    """Planificador con concurrencia acotada y colas justas por cliente"""
+
+    def __init__(self, max_concurrent: int = 8, max_queue_per_client: int = 3, max_queue: int = 100):
+        self.max_concurrent = max_concurrent
+        self.max_queue_per_client = max_queue_per_client
+        self.max_queue = max_queue
+        self._queues: "OrderedDict[str, Deque[Ticket]]" = OrderedDict()
+        self._running = 0
+        self._queued = 0
+        self._rejected = 0
+        self._granted = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, client_id: str) -> Ticket:
+        """Encola una petición; lanza SchedulerRejected si no hay sitio"""
+        queue = self._queues.get(client_id)
+        if self._queued >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_client):
+            self._rejected += 1
+            raise SchedulerRejected("Demasiadas solicitudes en cola, inténtalo de nuevo en unos segundos")
+        ticket = Ticket(self, client_id, self._queued + 1)
+        if queue is None:
+            queue = self._queues[client_id] = deque()
+        queue.append(ticket)
+        self._queued += 1
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self):
+        # Round-robin: se atiende un turno por cliente y el cliente pasa al final
+        while self._running < self.max_concurrent and self._queues:
+            client_id, queue = next(iter(self._queues.items()))
+            ticket = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(client_id)
+            else:
+                del self._queues[client_id]
+            self._running += 1
+            ticket.granted_at = time.monotonic()
+            waited = ticket.granted_at - ticket.submitted_at
+            self._granted += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            ticket._future.set_result(None)
+
+    def _release(self, ticket: Ticket):
+        if ticket.granted:
+            self._running -= 1
+        else:
+            queue = self._queues.get(ticket.client_id)
+            if queue is not None and ticket in queue:
+                queue.remove(ticket)
+                self._queued -= 1
+                if not queue:
+                    del self._queues[ticket.client_id]
+            ticket._future.cancel()
+        self._dispatch()
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth_by_client": {client_id: len(queue) for client_id, queue in self._queues.items()},
+            "rejected": self._rejected,
+            "granted": self._granted,
+            "wait_time_avg": self._wait_total / self._granted if self._granted else 0.0,
+            "wait_time_max": self._wait_max,
+        }
@@ -0,0 +1,351 @@
+"""
+Módulo de sesiones WebSocket reanudables
+
+Funcionalidades:
+- Cada evento enviado a un cliente recibe un número de secuencia creciente
+- Los últimos eventos de cada client_id se guardan en un buffer circular acotado
+- Al reconectar, el cliente indica la última secuencia recibida y se le reenvía lo posterior
+- Las generaciones en curso sobreviven a cortes breves; si el cliente no vuelve
+  antes del TTL la sesión se descarta y sus generaciones se cancelan
+- Con varios workers, solo el que tiene el socket del cliente guarda su sesión y
+  numera sus eventos; los demás le mandan los suyos por el backplane y, si el
+  cliente reconecta en otro worker, la sesión se le traspasa
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from structured_logging import get_logger
+from websocket_fanout import ConnectionChannel, ConnectionHub, encode_event
+
+if TYPE_CHECKING:
+    from backplane import Backplane
+
+log = get_logger("session_replay")
+
+
+class ReplaySession:
+    """Buffer circular de eventos ya codificados de un cliente"""
+
+    def __init__(self, capacity: int):
+        self.events: Deque[Tuple[int, str]] = deque(maxlen=capacity)
+        self.last_seq = 0
+        # Versión del protocolo negociada por el cliente (1 = legado); sobrevive a las reconexiones
+        self.protocol = 1
+        self.tasks: Set[asyncio.Task] = set()
+        self.detached_at: Optional[float] = None
+        self._expiry: Optional[asyncio.TimerHandle] = None
+        # Mientras se espera el traspaso de otro worker los eventos se retienen sin numerar
+        self.handoff: Optional[asyncio.Future] = None
+        self.held: List[Dict[str, Any]] = []
+
+    def record(self, event: Dict[str, Any]) -> Tuple[int, str]:
+        self.last_seq += 1
+        message = encode_event({**event, "seq": self.last_seq})
+        self.events.append((self.last_seq, message))
+        return self.last_seq, message
+
+    def remember(self, seq: int, message: str):
+        """Guarda un evento numerado por otro proceso (traspasado por el backplane)"""
+        if seq > self.last_seq:
+            self.last_seq = seq
+            self.events.append((seq, message))
+
+    def since(self, seq: int) -> Tuple[List[str], bool]:
+        """
+        Eventos posteriores a seq y si la reanudación es completa
+        (False si el buffer ya descartó alguno de los eventos pedidos).
+        """
+        complete = not self.events or self.events[0][0] <= seq + 1
+        return [message for event_seq, message in self.events if event_seq > seq], complete
+
+    def ack(self, seq: int):
+        """Descarta los eventos que el cliente confirma haber recibido"""
+        while self.events and self.events[0][0] <= seq:
+            self.events.popleft()
+
+    def track(self, task: asyncio.Task):
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+class SessionStore:
+    """
+    Sesiones reanudables por client_id.
+    capacity: eventos guardados por cliente; ttl: segundos que se conserva
+    una sesión sin conexiones antes de descartarla.
+    """
+
+    def __init__(self, capacity: int = 512, ttl: float = 60.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.sessions: Dict[str, ReplaySession] = {}
+        # Generaciones de clientes cuya sesión pasó a otro worker; se cancelan cuando allí caduca
+        self.orphans: Dict[str, Set[asyncio.Task]] = {}
+        self.on_expire: Optional[Callable[[str], None]] = None
+
+    def get(self, client_id: str) -> ReplaySession:
+        session = self.sessions.get(client_id)
+        if session is None:
+            session = self.sessions[client_id] = ReplaySession(self.capacity)
+        return session
+
+    def track(self, client_id: str, task: asyncio.Task):
+        """Asocia una generación a la sesión del cliente (o a sus huérfanas si la sesión está en otro worker)"""
+        session = self.sessions.get(client_id)
+        if session is not None:
+            session.track(task)
+            return
+        tasks = self.orphans.setdefault(client_id, set())
+        tasks.add(task)
+        task.add_done_callback(lambda done: self._forget_orphan(client_id, done))
+
+    def _forget_orphan(self, client_id: str, task: asyncio.Task):
+        tasks = self.orphans.get(client_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self.orphans[client_id]
+
+    def release(self, client_id: str) -> Optional[ReplaySession]:
+        """Entrega la sesión a otro worker; sus generaciones siguen aquí como huérfanas"""
+        session = self.sessions.pop(client_id, None)
+        if session is None:
+            return None
+        if session._expiry is not None:
+            session._expiry.cancel()
+            session._expiry = None
+        for task in list(session.tasks):
+            if not task.done():
+                self.orphans.setdefault(client_id, set()).add(task)
+                task.add_done_callback(lambda done: self._forget_orphan(client_id, done))
+        return session
+
+    def adopt(self, client_id: str) -> ReplaySession:
+        """Crea la sesión en este worker y recupera las generaciones huérfanas del cliente"""
+        session = self.get(client_id)
+        for task in self.orphans.pop(client_id, ()):
+            session.track(task)
+        return session
+
+    def cancel_orphans(self, client_id: str):
+        for task in list(self.orphans.pop(client_id, ())):
+            task.cancel()
+
+    def record(self, client_id: str, event: Dict[str, Any]) -> Tuple[int, str]:
+        """Numera y guarda un evento; devuelve (seq, mensaje codificado a enviar)"""
+        return self.get(client_id).record(event)
+
+    def attach(self, client_id: str, last_seq: Optional[int] = None) -> Tuple[List[str], bool, bool]:
+        """
+        Registra una conexión del cliente; devuelve (eventos a reenviar, si la
+        reanudación es completa, si la sesión se perdió).
+        Sin last_seq (cliente nuevo o sin soporte de reanudación) no se reenvía nada.
+        """
+        session = self.get(client_id)
+        session.detached_at = None
+        if session._expiry is not None:
+            session._expiry.cancel()
+            session._expiry = None
+        if last_seq is None:
+            return [], True, False
+        if last_seq > session.last_seq:
+            # La sesión caducó o el servidor se reinició: se sigue numerando desde
+            # last_seq para que el cliente no descarte los eventos nuevos
+            session.last_seq = last_seq
+            session.events.clear()
+            return [], False, True
+        session.ack(last_seq)
+        return (*session.since(last_seq), False)
+
+    def detach(self, client_id: str):
+        """El cliente se quedó sin conexiones: la sesión se conserva durante el TTL"""
+        session = self.sessions.get(client_id)
+        if session is None or session._expiry is not None:
+            return
+        session.detached_at = time.monotonic()
+        session._expiry = asyncio.get_running_loop().call_later(self.ttl, self._expire, client_id, session)
+
+    def _expire(self, client_id: str, session: ReplaySession):
+        if self.sessions.get(client_id) is not session or session.detached_at is None:
+            return
+        del self.sessions[client_id]
+        for task in list(session.tasks):
+            task.cancel()
+        log.info("Sesión expirada", client_id=client_id, cancelled=len(session.tasks), buffered=len(session.events))
+        if self.on_expire is not None:
+            self.on_expire(client_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self.sessions),
+            "detached": sum(1 for session in self.sessions.values() if session.detached_at is not None),
+            "buffered_events": sum(len(session.events) for session in self.sessions.values()),
+            "orphaned_tasks": sum(len(tasks) for tasks in self.orphans.values()),
+        }
+
+
+class SessionRouter:
+    """
+    Encamina los eventos de cada cliente entre workers. El dueño de la sesión es
+    el worker donde el cliente se conectó por última vez: solo él numera los
+    eventos y guarda el buffer de reenvío, así que las secuencias no se repiten.
+
+    Sobres del backplane:
+    - event: evento ya numerado por el dueño, para los sockets del cliente en
+      otros workers (otra pestaña)
+    - emit: evento sin numerar de un worker que no es el dueño
+    - ack: confirmación recibida en un socket que no es del dueño
+    - attach: el cliente se conectó en otro worker; el dueño le contesta con
+      handoff (último seq y eventos pendientes) y deja de serlo
+    - expire: la sesión caducó en el dueño; los demás cancelan sus generaciones
+    """
+
+    def __init__(self, hub: ConnectionHub, sessions: SessionStore, backplane: "Backplane",
+                 handoff_timeout: float = 1.0):
+        self.hub = hub
+        self.sessions = sessions
+        self.backplane = backplane
+        self.handoff_timeout = handoff_timeout
+        # Protocolo de los clientes cuya sesión está en otro worker (para generar aquí en su formato)
+        self.remote_protocols: Dict[str, int] = {}
+        sessions.on_expire = self._expired
+
+    async def start(self):
+        await self.backplane.start(self._on_backplane)
+
+    async def close(self):
+        await self.backplane.close()
+
+    def _post(self, envelope: Dict[str, Any]):
+        """Publica sin esperar; los errores del transporte solo se registran"""
+        def report(future: Awaitable):
+            if not future.cancelled() and future.exception() is not None:
+                log.warning("No se pudo publicar en el backplane", kind=envelope["kind"],
+                            error=str(future.exception()))
+        asyncio.ensure_future(self.backplane.post(envelope)).add_done_callback(report)
+
+    def _number(self, client_id: str, session: ReplaySession, event: Dict[str, Any]) -> Dict[str, Any]:
+        seq, message = session.record(event)
+        return {"kind": "event", "client_id": client_id, "seq": seq, "message": message}
+
+    def _expired(self, client_id: str):
+        self.remote_protocols.pop(client_id, None)
+        if self.backplane.shared:
+            self._post({"kind": "expire", "client_id": client_id})
+
+    def _on_backplane(self, envelope: Dict[str, Any], local: bool):
+        client_id = envelope["client_id"]
+        kind = envelope["kind"]
+        session = self.sessions.sessions.get(client_id)
+        if kind == "event":
+            # Durante un traspaso los eventos del dueño anterior llegan en el handoff
+            if session is None or session.handoff is None:
+                self.hub.publish(client_id, envelope["message"])
+        elif kind == "emit":
+            if session is not None:
+                if session.handoff is not None:
+                    session.held.append(envelope["event"])
+                else:
+                    self._post(self._number(client_id, session, envelope["event"]))
+        elif kind == "ack":
+            if session is not None:
+                session.ack(envelope["seq"])
+        elif kind == "expire":
+            self.remote_protocols.pop(client_id, None)
+            self.sessions.cancel_orphans(client_id)
+        elif local:
+            return
+        elif kind == "attach":
+            self.remote_protocols[client_id] = envelope.get("protocol", 1)
+            if session is None or session.handoff is not None:
+                return
+            self.sessions.release(client_id)
+            last_seq = envelope.get("last_seq")
+            self._post({
+                "kind": "handoff", "client_id": client_id, "target": envelope["origin"],
+                "last_seq": session.last_seq,
+                "events": [[seq, message] for seq, message in session.events if last_seq is None or seq > last_seq],
+            })
+            log.info("Sesión traspasada a otro worker", client_id=client_id, last_seq=session.last_seq)
+        elif kind == "handoff":
+            if envelope["target"] != self.backplane.worker_id or session is None or session.handoff is None:
+                return
+            session.last_seq = max(session.last_seq, envelope["last_seq"])
+            session.events.clear()
+            for seq, message in envelope["events"]:
+                session.events.append((seq, message))
+            if not session.handoff.done():
+                session.handoff.set_result(None)
+
+    async def attach(self, client_id: str, channel: ConnectionChannel, protocol: int,
+                     last_seq: Optional[int] = None):
+        """
+        Registra la conexión y encola "resumed" y la repetición (si el cliente
+        indicó last_seq) antes que cualquier evento en vivo. Si la sesión estaba en
+        otro worker, espera su traspaso como mucho handoff_timeout segundos.
+        """
+        session = self.sessions.sessions.get(client_id)
+        if session is None:
+            session = self.sessions.adopt(client_id)
+            self.remote_protocols.pop(client_id, None)
+            if self.backplane.shared:
+                if last_seq is not None:
+                    session.handoff = asyncio.get_running_loop().create_future()
+                self._post({"kind": "attach", "client_id": client_id, "protocol": protocol, "last_seq": last_seq})
+        if session.handoff is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(session.handoff), self.handoff_timeout)
+            except asyncio.TimeoutError:
+                log.info("Ningún worker traspasó la sesión", client_id=client_id)
+        replay, complete, reset = self.sessions.attach(client_id, last_seq)
+        session.protocol = protocol
+        if last_seq is not None:
+            channel.offer(encode_event({
+                "type": "resumed",
+                "data": {"last_seq": last_seq, "seq": session.last_seq, "replayed": len(replay),
+                         "complete": complete, "reset": reset},
+                "timestamp": datetime.now().isoformat(),
+            }))
+            for message in replay:
+                channel.offer(message)
+        if session.handoff is not None:
+            session.handoff = None
+            held, session.held = session.held, []
+            for event in held:
+                self._post(self._number(client_id, session, event))
+
+    def detach(self, client_id: str):
+        """Una conexión se cerró: sin conexiones aquí, la sesión (si es de este worker) espera el TTL"""
+        if client_id not in self.hub.connections:
+            self.sessions.detach(client_id)
+
+    async def send(self, event: Dict[str, Any], client_id: str):
+        session = self.sessions.sessions.get(client_id)
+        if session is None:
+            # La sesión está en otro worker (o ya no existe: entonces nadie lo recoge)
+            if self.backplane.shared:
+                await self.backplane.publish({"kind": "emit", "client_id": client_id, "event": event})
+            return
+        if session.handoff is not None:
+            session.held.append(event)
+            return
+        await self.backplane.publish(self._number(client_id, session, event))
+
+    async def ack(self, client_id: str, seq: int):
+        session = self.sessions.sessions.get(client_id)
+        if session is not None:
+            session.ack(seq)
+        elif self.backplane.shared:
+            await self.backplane.publish({"kind": "ack", "client_id": client_id, "seq": seq})
+
+    def track(self, client_id: str, task: asyncio.Task):
+        self.sessions.track(client_id, task)
+
+    def protocol(self, client_id: str, default: int = 1) -> int:
+        session = self.sessions.sessions.get(client_id)
+        if session is not None:
+            return session.protocol
+        return self.remote_protocols.get(client_id, default)
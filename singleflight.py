@@ -0,0 +1,131 @@
+"""
+Módulo para agrupar generaciones idénticas concurrentes (single-flight)
+
+Funcionalidades:
+- Tabla de generaciones en curso indexada por clave de petición
+- Las peticiones duplicadas se adjuntan a la generación existente
+- Cada suscriptor recibe todos los eventos, incluidos los ya emitidos
+- La generación se cancela cuando no queda ningún suscriptor
+- Si la generación falla, el error solo lo recibe quien la inició; los demás la
+  repiten como líderes nuevos o reciben un error genérico (LeaderFailed)
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+class LeaderFailed(Exception):
+    """La generación compartida falló en otro cliente; no se exponen sus detalles"""
+
+    def __init__(self):
+        super().__init__("La generación compartida falló, inténtalo de nuevo")
+
+
+class InflightGeneration:
+    """Generación en curso compartida por varios suscriptores"""
+
+    def __init__(self, key: str, owner: Optional[str] = None):
+        self.key = key
+        # Cliente que inició la generación (el único que ve su error)
+        self.owner = owner
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._cond = asyncio.Condition()
+
+    async def publish(self, event: Any):
+        async with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None):
+        async with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    async def subscribe(self, owner: Optional[str] = None) -> AsyncIterator[Any]:
+        """Itera sobre todos los eventos desde el inicio de la generación"""
+        self.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(lambda: index < len(self.events) or self.done)
+                    batch = self.events[index:]
+                    done = self.done
+                index += len(batch)
+                for event in batch:
+                    yield event
+                if done and index >= len(self.events):
+                    if self.error is not None:
+                        if owner != self.owner:
+                            raise LeaderFailed()
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self.task.cancel()
+
+
+class InflightTable:
+    """Tabla de generaciones en curso (una por clave)"""
+
+    def __init__(self):
+        self._inflight: Dict[str, InflightGeneration] = {}
+        self.stats = {"leaders": 0, "followers": 0, "retries": 0}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def join(self, key: str, factory: Callable[[], AsyncIterator[Any]],
+             owner: Optional[str] = None) -> AsyncIterator[Any]:
+        """
+        Devuelve un iterador de eventos para la clave. Si no hay una generación
+        en curso se inicia con factory() a nombre de owner; si la hay, se adjunta
+        a ella y, si falla, recibe LeaderFailed en lugar del error del líder.
+        """
+        generation = self._inflight.get(key)
+        if generation is None:
+            generation = InflightGeneration(key, owner)
+            self._inflight[key] = generation
+            generation.task = asyncio.create_task(self._run(generation, factory()))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["followers"] += 1
+        return generation.subscribe(owner)
+
+    async def share(self, key: str, owner: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Como join, pero un seguidor cuya generación compartida falla antes de
+        emitir nada (por ejemplo, el planificador rechazó al líder) la repite con
+        su propio factory(), como líder nuevo o adjunto a otro que ya lo hizo.
+        Si ya había recibido eventos, recibe LeaderFailed.
+        """
+        while True:
+            received = False
+            try:
+                async for event in self.join(key, factory, owner):
+                    received = True
+                    yield event
+                return
+            except LeaderFailed:
+                if received:
+                    raise
+                self.stats["retries"] += 1
+
+    async def _run(self, generation: InflightGeneration, source: AsyncIterator[Any]):
+        error = None
+        try:
+            async for event in source:
+                await generation.publish(event)
+        except asyncio.CancelledError as e:
+            error = e
+        except Exception as e:
+            error = e
+        finally:
+            if self._inflight.get(generation.key) is generation:
+                del self._inflight[generation.key]
+            await generation.finish(error)
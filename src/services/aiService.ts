@@ -1,31 +1,49 @@
-import { v4 as uuidv4 } from 'uuid';
+import { clientId } from './clientId';
 
 interface AIMessage {
-  type: 'thinking' | 'writing' | 'analyzing' | 'completed';
+  type: 'thinking' | 'writing' | 'analyzing' | 'completed' | 'resumed';
   data: {
     code?: string;
     message: string;
+    // Solo en "resumed": la sesión se perdió y la numeración continúa en seq
+    reset?: boolean;
+    seq?: number;
   };
   timestamp: string;
+  seq?: number;
 }
 
 class AIService {
   private ws: WebSocket | null = null;
-  private clientId: string;
+  private clientId = clientId;
+  // Última secuencia recibida: al reconectar el servidor reenvía los eventos posteriores
+  private lastSeq: number | null = null;
   private messageHandlers: ((message: AIMessage) => void)[] = [];
 
   constructor() {
-    this.clientId = uuidv4();
     this.connect();
   }
 
   private connect() {
-    this.ws = new WebSocket(`ws://localhost:3000/ws/${this.clientId}`);
+    const resume = this.lastSeq !== null ? `?last_seq=${this.lastSeq}` : '';
+    this.ws = new WebSocket(`ws://localhost:3000/ws/${this.clientId}${resume}`);
 
     this.ws.onmessage = (event) => {
       const message: AIMessage = JSON.parse(event.data);
       console.log('[WebSocket][aiService] Mensaje recibido:', message);
+      if (message.type === 'resumed' && message.data.reset) {
+        this.lastSeq = message.data.seq ?? null;
+      }
+      if (message.seq !== undefined) {
+        if (this.lastSeq !== null && message.seq <= this.lastSeq) {
+          return;
+        }
+        this.lastSeq = message.seq;
+      }
       this.messageHandlers.forEach(handler => handler(message));
+      if (message.type === 'completed' && message.seq !== undefined) {
+        this.ws?.send(JSON.stringify({ type: 'ack', seq: message.seq }));
+      }
     };
 
     this.ws.onclose = () => {
@@ -0,0 +1,5 @@
+import { v4 as uuidv4 } from 'uuid';
+
+// Identificador de este cliente: el websocket lo usa en la ruta y las peticiones
+// de archivos en X-Client-Id; el servidor deriva de él el espacio de trabajo
+export const clientId = uuidv4();
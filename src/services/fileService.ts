@@ -1,6 +1,7 @@
 import axios from 'axios';
 import JSZip from 'jszip';
 import { saveAs } from 'file-saver';
+import { clientId } from './clientId';
 
 interface FileContent {
   name: string;
@@ -8,9 +9,12 @@ interface FileContent {
   language: string;
 }
 
+// El servidor guarda los archivos en el espacio de trabajo de este cliente
+const clientHeaders = { headers: { 'X-Client-Id': clientId } };
+
 export const createFile = async (file: FileContent) => {
   try {
-    const response = await axios.post('http://localhost:8000/api/files', file);
+    const response = await axios.post('http://localhost:8000/api/files', file, clientHeaders);
     return response.data;
   } catch (error) {
     console.error('Error creating file:', error);
@@ -18,9 +22,32 @@ export const createFile = async (file: FileContent) => {
   }
 };
 
+export interface BatchFileResult {
+  status: 'created' | 'updated' | 'unchanged' | 'error';
+  error?: string;
+}
+
+export interface BatchWriteResponse {
+  files: { [filename: string]: BatchFileResult };
+  written: number;
+  unchanged: number;
+  failed: number;
+}
+
+// Escribe todos los archivos del proyecto en una sola petición
+export const createFiles = async (files: FileContent[]): Promise<BatchWriteResponse> => {
+  try {
+    const response = await axios.post('http://localhost:8000/api/files/batch', { files }, clientHeaders);
+    return response.data;
+  } catch (error) {
+    console.error('Error creating files:', error);
+    throw error;
+  }
+};
+
 export const getFileContent = async (filename: string) => {
   try {
-    const response = await axios.get(`http://localhost:8000/api/files/${filename}`);
+    const response = await axios.get(`http://localhost:8000/api/files/${filename}`, clientHeaders);
     return response.data;
   } catch (error) {
     console.error('Error getting file:', error);
@@ -0,0 +1,114 @@
+"""
+Módulo de logging estructurado y no bloqueante para GENSITE
+
+Funcionalidades:
+- Registros en formato JSON (una línea por evento) con campos estructurados
+- Escritura a través de una cola y un hilo en segundo plano (QueueHandler/QueueListener),
+  para que el event loop nunca espere a stdout
+- Niveles configurables y muestreo de los eventos de alto volumen
+- Las respuestas completas del modelo se guardan como referencia (hash + vista previa);
+  el contenido completo solo se registra con el flag de depuración activo
+"""
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+_RESERVED = ("exc_info", "stack_info", "stacklevel", "extra")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar solo una fracción de los registros marcados como muestreables"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            return random.random() < self.rate
+        return True
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Adaptador que acepta campos como argumentos con nombre:
+    log.info("Archivo enviado", filename="App.tsx", sampled=True)
+    """
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _RESERVED}
+        sampled = fields.pop("sampled", False)
+        kwargs["extra"] = {**kwargs.get("extra", {}), "fields": fields, "sampled": sampled}
+        return msg, kwargs
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None, sample_rate: Optional[float] = None):
+    """Configura el logger "gensite" con una cola y un hilo escritor (una sola vez)"""
+    global _listener
+    if _listener is not None:
+        return
+    level = level or os.environ.get("GENSITE_LOG_LEVEL", "INFO")
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("GENSITE_LOG_SAMPLE_RATE", "0.1"))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    logger = logging.getLogger("gensite")
+    logger.setLevel(level.upper())
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    setup_logging()
+    return StructuredLogger(logging.getLogger(f"gensite.{name}"), {})
+
+
+def payload_ref(text: str, preview: int = 200) -> Dict:
+    """
+    Referencia compacta a un payload grande (respuesta del modelo, proyecto...).
+    Con GENSITE_LOG_PAYLOADS=1 incluye además el contenido completo.
+    """
+    ref = {
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "chars": len(text),
+        "preview": text[:preview],
+    }
+    if os.environ.get("GENSITE_LOG_PAYLOADS") == "1":
+        ref["content"] = text
+    return ref
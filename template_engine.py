@@ -0,0 +1,426 @@
+"""
+Módulo de plantillas de código
+
+Funcionalidades:
+- Sintaxis {{ variable }}, {{ variable | filtro }}, {{#if x}}...{{else}}...{{/if}}
+  y {{#each lista as elemento}}...{{/each}}; las llaves que no forman una
+  etiqueta válida (style={{ margin: 0 }} en JSX, reglas CSS) se copian tal cual
+  y {{raw}}...{{/raw}} protege un bloque entero
+- Cada plantilla se analiza una sola vez y se compila a una función Python
+  generadora; las fuentes iguales comparten la función compilada
+- Caché de renderizados por (plantilla, versión, hash de los parámetros)
+- Renderizado en streaming por fragmentos
+- Carga desde la tabla plantillas de Supabase con caché local versionada:
+  solo se descargan las plantillas cuya versión cambió y, sin conexión, se
+  usan las últimas guardadas
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from project_files import write_atomic
+from structured_logging import get_logger
+
+log = get_logger("template_engine")
+
+CHUNK_SIZE = 16 * 1024
+
+_TOKEN = re.compile(r"\{\{\s*raw\s*\}\}(.*?)\{\{\s*/raw\s*\}\}|\{\{(.*?)\}\}", re.DOTALL)
+# Ningún segmento empieza por "_": una plantilla no puede llegar a __class__, __globals__...
+_NAME = r"[A-Za-z]\w*"
+_PATH = rf"{_NAME}(?:\.(?:{_NAME}|\d+))*"
+_EXPRESSION = re.compile(rf"^\s*({_PATH})((?:\s*\|\s*\w+)*)\s*$")
+_IF = re.compile(rf"^\s*#if\s+(not\s+)?({_PATH})\s*$")
+_EACH = re.compile(rf"^\s*#each\s+({_PATH})\s+as\s+({_NAME})\s*$")
+_CLOSE = re.compile(r"^\s*/(if|each)\s*$")
+_ELSE = re.compile(r"^\s*else\s*$")
+
+FILTERS: Dict[str, Callable[[Any], str]] = {
+    "upper": lambda value: _text(value).upper(),
+    "lower": lambda value: _text(value).lower(),
+    "title": lambda value: _text(value).title(),
+    "strip": lambda value: _text(value).strip(),
+    "escape": lambda value: html.escape(_text(value)),
+    "json": lambda value: json.dumps(value, ensure_ascii=False),
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class _Missing(Exception):
+    pass
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else value if isinstance(value, str) else str(value)
+
+
+def _get(scope: Dict[str, Any], name: str) -> Any:
+    try:
+        return scope[name]
+    except KeyError:
+        raise _Missing(name) from None
+
+
+def _attr(value: Any, name: str, path: str) -> Any:
+    """
+    Campo de un diccionario, posición de una lista o atributo público de datos
+    de un objeto (nunca privado ni un método)
+    """
+    if isinstance(value, dict):
+        if name in value:
+            return value[name]
+    elif isinstance(value, (list, tuple)) and name.isdigit():
+        if int(name) < len(value):
+            return value[int(name)]
+    elif not name.startswith("_"):
+        attribute = getattr(value, name, _attr)
+        if attribute is not _attr and not callable(attribute):
+            return attribute
+    raise _Missing(path)
+
+
+def _iterate(value: Any) -> Any:
+    return value.items() if isinstance(value, dict) else value or ()
+
+
+class _Compiler:
+    """Traduce la lista de fragmentos de la plantilla a código de una función generadora"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.lines = ["def _render(_scope):"]
+        self.indent = 1
+        self.loop_vars: List[str] = []
+        # (etiqueta, línea en la plantilla, ¿el bloque tiene cuerpo?)
+        self.blocks: List[List] = []
+        self.literals: List[str] = []
+
+    def emit(self, code: str):
+        self.lines.append("    " * self.indent + code)
+        if self.blocks:
+            self.blocks[-1][2] = True
+
+    def flush_literal(self):
+        if self.literals:
+            text = "".join(self.literals)
+            self.literals = []
+            if text:
+                self.emit(f"yield {text!r}")
+
+    def value(self, path: str) -> str:
+        first, *rest = path.split(".")
+        code = f"_v_{first}" if first in self.loop_vars else f"_get(_scope, {first!r})"
+        for name in rest:
+            code = f"_attr({code}, {name!r}, {path!r})"
+        return code
+
+    def open_block(self, kind: str, line: int, header: str):
+        self.flush_literal()
+        self.emit(header)
+        self.blocks.append([kind, line, False])
+        self.indent += 1
+
+    def close_block(self, kind: str, line: int):
+        self.flush_literal()
+        if not self.blocks or self.blocks[-1][0] != kind:
+            raise TemplateError(f"{{{{/{kind}}}}} sin abrir en la línea {line}")
+        if not self.blocks[-1][2]:
+            self.emit("pass")
+        self.blocks.pop()
+        self.indent -= 1
+        if kind == "each":
+            self.loop_vars.pop()
+
+    def tag(self, content: str, line: int) -> bool:
+        """Traduce una etiqueta; devuelve False si no lo es (se copia como texto)"""
+        m = _IF.match(content)
+        if m:
+            self.open_block("if", line, f"if {'not ' if m.group(1) else ''}{self.value(m.group(2))}:")
+            return True
+        m = _EACH.match(content)
+        if m:
+            self.open_block("each", line, f"for _v_{m.group(2)} in _iterate({self.value(m.group(1))}):")
+            self.loop_vars.append(m.group(2))
+            return True
+        if _ELSE.match(content):
+            if not self.blocks or self.blocks[-1][0] != "if":
+                raise TemplateError(f"{{{{else}}}} fuera de un {{{{#if}}}} en la línea {line}")
+            self.close_block("if", line)
+            self.emit("else:")
+            self.blocks.append(["if", line, False])
+            self.indent += 1
+            return True
+        m = _CLOSE.match(content)
+        if m:
+            self.close_block(m.group(1), line)
+            return True
+        m = _EXPRESSION.match(content)
+        if m:
+            self.flush_literal()
+            code = self.value(m.group(1))
+            for name in (part.strip() for part in m.group(2).split("|")[1:]):
+                if name not in FILTERS:
+                    raise TemplateError(f"Filtro desconocido '{name}' en la línea {line}")
+                code = f"_filters[{name!r}]({code})"
+            self.emit(f"yield _text({code})")
+            return True
+        return False
+
+    def compile(self) -> Callable[[Dict[str, Any]], Iterator[str]]:
+        position = 0
+        for m in _TOKEN.finditer(self.source):
+            self.literals.append(self.source[position:m.start()])
+            position = m.end()
+            if m.group(1) is not None:
+                self.literals.append(m.group(1))
+            elif not self.tag(m.group(2), self.source.count("\n", 0, m.start()) + 1):
+                self.literals.append(m.group(0))
+        self.literals.append(self.source[position:])
+        self.flush_literal()
+        if self.blocks:
+            kind, line, _ = self.blocks[-1]
+            raise TemplateError(f"{{{{#{kind}}}}} de la línea {line} sin cerrar")
+        self.lines.append("    return")
+        self.lines.append("    yield")
+        namespace = {"_get": _get, "_attr": _attr, "_iterate": _iterate, "_text": _text, "_filters": FILTERS}
+        exec(compile("\n".join(self.lines), "<plantilla>", "exec"), namespace)
+        return namespace["_render"]
+
+
+@lru_cache(maxsize=256)
+def compile_source(source: str) -> Callable[[Dict[str, Any]], Iterator[str]]:
+    """Función generadora de la plantilla; las fuentes iguales se compilan una sola vez"""
+    return _Compiler(source).compile()
+
+
+def _unhashable(value: Any):
+    raise TemplateError(f"Parámetro de tipo {type(value).__name__} no admitido: solo tipos JSON")
+
+
+def params_hash(params: Dict[str, Any]) -> str:
+    """
+    Hash de los parámetros para la clave de caché. Solo admite tipos JSON: con
+    repr() la clave de un objeto incluiría su dirección y nunca volvería a acertar.
+    """
+    try:
+        raw = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_unhashable)
+    except TypeError as e:  # claves de distinto tipo que no se pueden ordenar
+        raise TemplateError(f"Parámetros no admitidos: {e}") from None
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Template:
+    """Plantilla con nombre y versión; se compila en el primer renderizado"""
+
+    def __init__(self, name: str, source: str, version: Optional[str] = None,
+                 defaults: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.source = source
+        self.defaults = defaults or {}
+        # Los parámetros por defecto forman parte de la versión: cambian el resultado
+        self.version = version or hashlib.sha256(
+            f"{source}\0{params_hash(self.defaults)}".encode("utf-8")).hexdigest()[:16]
+        self._render: Optional[Callable[[Dict[str, Any]], Iterator[str]]] = None
+
+    def compiled(self) -> Callable[[Dict[str, Any]], Iterator[str]]:
+        if self._render is None:
+            try:
+                self._render = compile_source(self.source)
+            except TemplateError as e:
+                raise TemplateError(f"Plantilla '{self.name}': {e}") from None
+        return self._render
+
+    def fragments(self, params: Dict[str, Any]) -> Iterator[str]:
+        scope = {**self.defaults, **params} if self.defaults else params
+        try:
+            yield from self.compiled()(scope)
+        except _Missing as e:
+            raise TemplateError(f"Plantilla '{self.name}': falta el parámetro '{e.args[0]}'") from None
+
+    def render(self, params: Dict[str, Any]) -> str:
+        return "".join(self.fragments(params))
+
+    def stream(self, params: Dict[str, Any], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """Texto por fragmentos de unos chunk_size caracteres"""
+        buffer: List[str] = []
+        size = 0
+        for fragment in self.fragments(params):
+            buffer.append(fragment)
+            size += len(fragment)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+
+
+class RenderCache:
+    """LRU por tamaño de los textos ya renderizados. Segura entre hilos."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: Tuple[str, str, str], text: str):
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = text
+            self._bytes += len(text)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+render_cache = RenderCache(int(os.environ.get("GENSITE_TEMPLATE_CACHE_BYTES", str(32 * 1024 * 1024))))
+
+
+class TemplateRegistry:
+    """
+    Plantillas por nombre con renderizado cacheado. Las de Supabase se guardan
+    en cache_path ({nombre: {version, partes}}) para no volver a descargarlas
+    mientras no cambie su versión.
+    """
+
+    # Columnas de la tabla plantillas y sufijo del nombre con que se registra cada una
+    PARTS = (("contenido_html", ""), ("estilos_css", ".css"), ("scripts_js", ".js"))
+
+    def __init__(self, cache: RenderCache = render_cache, cache_path: Optional[str] = None,
+                 refresh_interval: float = 300.0):
+        self.templates: Dict[str, Template] = {}
+        self.cache = cache
+        self.cache_path = cache_path or os.path.join(
+            os.environ.get("GENSITE_TEMPLATES_DIR", ".gensite_templates"), "plantillas.json")
+        self.refresh_interval = refresh_interval
+        self._remote: Dict[str, Dict[str, Any]] = {}
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        # Sin esperar a sync(): las plantillas ya descargadas están disponibles desde el arranque
+        self.load_local()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.templates
+
+    def register(self, name: str, source: str, version: Optional[str] = None,
+                 defaults: Optional[Dict[str, Any]] = None) -> Template:
+        template = Template(name, source, version, defaults)
+        self.templates[name] = template
+        return template
+
+    def get(self, name: str) -> Template:
+        template = self.templates.get(name)
+        if template is None:
+            raise ValueError(f"Plantilla '{name}' no encontrada")
+        return template
+
+    def render(self, name: str, params: Dict[str, Any]) -> str:
+        template = self.get(name)
+        key = (name, template.version, params_hash(params))
+        text = self.cache.get(key)
+        if text is None:
+            text = template.render(params)
+            self.cache.put(key, text)
+        return text
+
+    def stream(self, name: str, params: Dict[str, Any], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """Renderizado por fragmentos; si ya está en caché se trocea el texto guardado"""
+        template = self.get(name)
+        key = (name, template.version, params_hash(params))
+        text = self.cache.get(key)
+        if text is not None:
+            return (text[start:start + chunk_size] for start in range(0, len(text), chunk_size))
+        return self._stream_and_cache(template, key, params, chunk_size)
+
+    def _stream_and_cache(self, template: Template, key: Tuple[str, str, str], params: Dict[str, Any],
+                          chunk_size: int) -> Iterator[str]:
+        chunks = []
+        for chunk in template.stream(params, chunk_size):
+            chunks.append(chunk)
+            yield chunk
+        # Solo se guarda si el consumidor recorrió el texto completo
+        self.cache.put(key, "".join(chunks))
+
+    def _register_remote(self, name: str, row: Dict[str, Any]):
+        for column, suffix in self.PARTS:
+            if row.get(column) is not None:
+                self.register(name + suffix, row[column], f"{row['version']}{suffix}")
+
+    def load_local(self) -> int:
+        """Registra las plantillas de la caché local; devuelve cuántas había"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                remote = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        with self._lock:
+            self._remote = remote
+            for name, row in remote.items():
+                self._register_remote(name, row)
+        return len(remote)
+
+    def sync(self, supabase, force: bool = False) -> int:
+        """
+        Sincroniza con la tabla plantillas (bloqueante: llamar fuera del event
+        loop). Primero pide solo nombre y versión y después el contenido de las
+        que cambiaron. Devuelve cuántas se descargaron.
+        """
+        if not force and time.monotonic() - self._synced_at < self.refresh_interval:
+            return 0
+        try:
+            table = supabase.client.table("plantillas")
+            versions = {row["nombre"]: str(row.get("actualizado_en") or row.get("id"))
+                        for row in table.select("nombre,actualizado_en,id").execute().data}
+            changed = [name for name, version in versions.items()
+                       if self._remote.get(name, {}).get("version") != version]
+            rows = table.select("*").in_("nombre", changed).execute().data if changed else []
+        except Exception as e:
+            log.warning("No se pudieron sincronizar las plantillas; se usa la caché local",
+                        error=str(e), templates=len(self._remote))
+            return 0
+        with self._lock:
+            remote = {name: row for name, row in self._remote.items() if name in versions}
+            for row in rows:
+                name = row["nombre"]
+                remote[name] = {"version": versions.get(name, str(row.get("actualizado_en"))),
+                                **{column: row.get(column) for column, _ in self.PARTS}}
+                self._register_remote(name, remote[name])
+            removed = set(self._remote) - set(remote)
+            for name in removed:
+                for _, suffix in self.PARTS:
+                    self.templates.pop(name + suffix, None)
+            self._remote = remote
+            self._synced_at = time.monotonic()
+        if rows or removed:
+            write_atomic(self.cache_path, json.dumps(remote, ensure_ascii=False).encode("utf-8"))
+        log.info("Plantillas sincronizadas", templates=len(remote), downloaded=len(rows))
+        return len(rows)
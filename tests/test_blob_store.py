@@ -0,0 +1,68 @@
+import os
+
+from blob_store import BlobStore, blob_digest
+
+
+def _age(store, digest):
+    for compressed in (False, True):
+        path = store.path_for(digest, compressed)
+        if os.path.exists(path):
+            os.utime(path, (0, 0))
+
+
+def test_add_persist_and_deduplicate(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digest = store.add(b"hola")
+    assert digest == blob_digest(b"hola")
+    assert store.peek(digest) == b"hola"
+    assert store.persist(digest)
+    assert not store.persist(digest)
+    store.add(b"hola")
+    assert not store.persist(digest)
+    assert BlobStore(str(tmp_path)).get(digest) == b"hola"
+    assert store.stats()["writes"] == 1 and store.stats()["deduplicated"] == 1
+
+
+def test_refcounts(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.incref(["a", "a", "b"])
+    store.decref(["a", "b"])
+    assert store.refcounts == {"a": 1}
+    store.decref(["a", "a"])
+    assert store.refcounts == {}
+
+
+def test_collect_respects_references_memory_use_and_grace(tmp_path):
+    store = BlobStore(str(tmp_path))
+    referenced, in_use, fresh, garbage = (store.add(data) for data in (b"r", b"u", b"f", b"g"))
+    for digest in (referenced, in_use, fresh, garbage):
+        store.persist(digest)
+    store.incref([referenced])
+    for digest in (referenced, in_use, garbage):
+        _age(store, digest)
+    assert store.collect({in_use}) == 1
+    assert store.get(garbage) is None
+    assert all(store.get(digest) is not None for digest in (referenced, in_use, fresh))
+
+
+def test_pending_blob_survives_collect(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digest = store.add(b"x")
+    store.persist(digest)
+    _age(store, digest)
+    # El contenido vuelve a escribirse (ya está en la caché) antes de la recolección
+    store.add(b"x")
+    assert store.collect(set()) == 0
+    assert store.pending([digest, "otro"]) == {digest}
+
+
+def test_rewrites_hot_blob_deleted_from_disk(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digest = store.add(b"x")
+    store.persist(digest)
+    _age(store, digest)
+    # Otro proceso borra el blob; aquí sigue en la caché
+    assert BlobStore(str(tmp_path)).collect(set()) == 1
+    store.add(b"x")
+    assert store.persist(digest)
+    assert BlobStore(str(tmp_path)).get(digest) == b"x"
@@ -0,0 +1,92 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from blob_store import blob_digest
+from export_cache import ExportCache, merkle_hash, read_chunks
+from zip_stream import CHUNK_SIZE
+
+FILES = {
+    "index.html": b"<h1>hola</h1>" * 200,
+    "src/App.tsx": b"export default () => null\n",
+    "src/ñandú.css": "body { color: red }".encode("utf-8"),
+    "logo.png": os.urandom(512),
+}
+
+
+def _project(files):
+    blobs = {blob_digest(data): data for data in files.values()}
+    listing = sorted((name, blob_digest(data)) for name, data in files.items())
+    return listing, blobs.get
+
+
+def _unzip(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+def test_artifact_round_trip_and_reuse(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    listing, load = _project(FILES)
+    project_hash = merkle_hash(listing)
+    first = b"".join(read_chunks(cache.artifact(project_hash, listing, load)))
+    assert _unzip(first) == FILES
+    assert b"".join(read_chunks(cache.artifact(project_hash, listing, load))) == first
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+    # Otro proceso sobre el mismo directorio reutiliza el ZIP sin cargar nada
+    restarted = ExportCache(str(tmp_path))
+    assert b"".join(read_chunks(restarted.artifact(project_hash, listing, lambda digest: None))) == first
+
+
+def test_stream_round_trip(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    listing, load = _project(FILES)
+    assert _unzip(b"".join(cache.stream(listing, load))) == FILES
+
+
+def test_stream_compresses_large_files_in_chunks(tmp_path):
+    cache = ExportCache(str(tmp_path), stream_threshold=1024)
+    files = {**FILES, "video.mp4": os.urandom(5 * CHUNK_SIZE), "big.js": b"let a = 1;\n" * 50000}
+    listing, load = _project(files)
+    chunks = list(cache.stream(listing, load))
+    assert max(len(chunk) for chunk in chunks) <= CHUNK_SIZE + 1024
+    assert _unzip(b"".join(chunks)) == files
+    # Solo los archivos pequeños quedan como entradas reutilizables
+    assert cache.stats()["entries"] == 3
+
+
+def test_large_project_is_not_cached(tmp_path):
+    cache = ExportCache(str(tmp_path), max_artifact_bytes=100)
+    listing, load = _project(FILES)
+    assert cache.artifact(merkle_hash(listing), listing, load) is None
+    assert not [name for name in os.listdir(str(tmp_path))]
+
+
+def test_disk_budget_evicts_oldest_artifact(tmp_path):
+    listing, load = _project(FILES)
+    size = len(b"".join(ExportCache(str(tmp_path / "medida")).stream(listing, load)))
+    cache = ExportCache(str(tmp_path / "zips"), max_disk_bytes=size + size // 2)
+    opened = cache.artifact("a" * 64, listing, load)
+    read_chunks(cache.artifact("b" * 64, listing, load)).close()
+    assert sorted(os.listdir(str(tmp_path / "zips"))) == ["b" * 64 + ".zip"]
+    assert cache.stats()["artifact_bytes"] <= cache.max_disk_bytes
+    # El ZIP expulsado que ya estaba abierto se sigue pudiendo enviar
+    assert _unzip(b"".join(read_chunks(opened))) == FILES
+
+
+def test_merkle_hash_file_and_folder_with_same_name():
+    files = [("a", "1" * 64), ("a/b.html", "2" * 64)]
+    assert merkle_hash(files) == merkle_hash(reversed(files))
+    assert merkle_hash(files) != merkle_hash(files[1:])
+
+
+def test_merkle_hash_is_download_etag():
+    file_serving = pytest.importorskip("file_serving")
+    listing, _ = _project(FILES)
+    etag = f'"{merkle_hash(listing)}"'
+    assert file_serving.etag_matches(etag, etag)
+    changed, _ = _project({**FILES, "index.html": b"cambiado"})
+    assert not file_serving.etag_matches(etag, f'"{merkle_hash(changed)}"')
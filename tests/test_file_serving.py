@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from starlette.requests import Request  # noqa: E402
+
+from blob_store import blob_digest  # noqa: E402
+from file_serving import RangeNotSatisfiable, parse_range, raw_response  # noqa: E402
+
+DATA = bytes(range(256)) * 4
+DIGEST = blob_digest(DATA)
+ETAG = f'"{DIGEST}"'
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/files/raw/app.js",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.fixture(params=["memory", "disk"])
+def serve(request, tmp_path):
+    path = None
+    if request.param == "disk":
+        path = os.path.join(str(tmp_path), "blob")
+        with open(path, "wb") as f:
+            f.write(DATA)
+
+    def serve(**headers):
+        return raw_response(_request(**headers), "app.js", DIGEST, len(DATA),
+                            path=path, data=None if path else DATA)
+    return serve
+
+
+async def _body(response):
+    if hasattr(response, "body_iterator"):
+        return b"".join([chunk async for chunk in response.body_iterator])
+    if hasattr(response, "body"):
+        return response.body
+    with open(response.path, "rb") as f:
+        return f.read()
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=x-1", 100) is None
+    assert parse_range("bytes=5-2", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_etag_and_not_modified(serve):
+    response = serve()
+    assert response.status_code == 200
+    assert response.headers["etag"] == ETAG
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert serve(if_none_match=ETAG).status_code == 304
+    assert serve(if_none_match=f'"otro", W/{ETAG}').status_code == 304
+    assert serve(if_none_match='"otro"').status_code == 200
+
+
+@pytest.mark.parametrize("header,start,end", [("bytes=10-19", 10, 19), ("bytes=-16", len(DATA) - 16, len(DATA) - 1)])
+def test_single_and_suffix_range(serve, header, start, end):
+    response = serve(range=header)
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+    assert asyncio.run(_body(response)) == DATA[start:end + 1]
+
+
+def test_unsatisfiable_range(serve):
+    response = serve(range=f"bytes={len(DATA)}-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_reversed_range_sends_whole_file(serve):
+    response = serve(range="bytes=20-10")
+    assert response.status_code == 200
+    assert asyncio.run(_body(response)) == DATA
+
+
+def test_if_range(serve):
+    assert serve(range="bytes=0-3", if_range=ETAG).status_code == 206
+    stale = serve(range="bytes=0-3", if_range='"anterior"')
+    assert stale.status_code == 200
+    assert asyncio.run(_body(stale)) == DATA
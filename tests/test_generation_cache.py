@@ -0,0 +1,23 @@
+from generation_cache import GenerationCache, cache_key, normalize_prompt
+
+RESULT = {"message": "ok", "files": {"index.html": {"content": "<h1>Hola</h1>"}}}
+
+
+def test_normalize_prompt_only_collapses_whitespace():
+    assert normalize_prompt("  Tienda de   café\n\tACME ") == "Tienda de café ACME"
+    assert cache_key("gpt-4", "v1", "Tienda  ACME", 0.7) == cache_key("gpt-4", "v1", " Tienda ACME\n", 0.7)
+    assert cache_key("gpt-4", "v1", "Tienda ACME", 0.7) != cache_key("gpt-4", "v1", "tienda acme", 0.7)
+
+
+def test_snapshot_counts_hits_and_misses(tmp_path):
+    cache = GenerationCache(str(tmp_path))
+    key = cache_key("gpt-4", "v1", "landing", 0.7)
+    assert cache.get(key) is None
+    cache.put(key, RESULT)
+    assert cache.get(key) == RESULT
+    assert GenerationCache(str(tmp_path)).get(key) == RESULT
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["memory_hits"], snapshot["misses"]) == (1, 1, 1)
+    assert snapshot["hit_rate"] == 0.5
+    assert snapshot["memory_entries"] == 1
+    assert snapshot["disk_bytes"] > 0
@@ -0,0 +1,13 @@
+import pytest
+
+import import_budget
+
+
+def test_main_import_within_budget():
+    try:
+        total, children, imported = min((import_budget.measure("main") for _ in range(3)),
+                                        key=lambda sample: sample[0])
+    except RuntimeError as e:
+        pytest.skip(f"faltan dependencias del backend: {e}")
+    assert not imported.intersection(import_budget.LAZY_MODULES)
+    assert total <= import_budget.DEFAULT_BUDGET_MS, sorted(children.items(), key=lambda item: -item[1])[:10]
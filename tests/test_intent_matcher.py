@@ -0,0 +1,33 @@
+from intent_matcher import INTENCIONES, IntentMatcher, detectar_intenciones, matcher_for
+
+
+def test_keywords_match_whole_words_only():
+    saludos = IntentMatcher({"saludo": ["hi", "hola"]})
+    assert saludos.intents_in("abre el archivo") == []
+    assert saludos.intents_in("hilo de ejecución") == []
+    assert saludos.intents_in("Hi, ¿qué tal?") == ["saludo"]
+    assert saludos.intents_in("¡Hola!") == ["saludo"]
+
+
+def test_enclitic_pronouns_on_infinitives():
+    assert detectar_intenciones("¿puedes cambiarlo a azul?") == ["modificar"]
+    assert detectar_intenciones("quiero hacerme una web") == ["generar"]
+
+
+def test_ranked_by_matches_then_table_order():
+    ranked = matcher_for(INTENCIONES).match("cambia el header, edita el footer y crea una página")
+    assert [(match.intent, match.score) for match in ranked] == [("modificar", 2), ("generar", 1)]
+    tie = matcher_for(INTENCIONES).match("cambia el header y crea una página")
+    assert [match.intent for match in tie] == ["generar", "modificar"]
+
+
+def test_spans_point_into_the_original_text():
+    text = "Quiero CAMBIAR el menú"
+    [match] = matcher_for(INTENCIONES).match(text)
+    assert [text[start:end] for start, end in match.spans] == ["CAMBIAR"]
+
+
+def test_batch_matches_single_messages():
+    texts = ["hola", "cambia el color", "", "crear y crear", "información"]
+    matcher = matcher_for({"saludo": ["hola"], **INTENCIONES})
+    assert matcher.match_batch(texts) == [matcher.match(text) for text in texts]
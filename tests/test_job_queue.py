@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from job_queue import FAILED, QUEUED, JobStore
+
+
+def _claimed(tmp_path, max_attempts=3):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_attempts=max_attempts)
+    job_id = store.submit("landing", "cliente")
+    assert store.claim("w1")["id"] == job_id
+    return store, job_id
+
+
+def test_transient_failure_is_retried(tmp_path):
+    store, job_id = _claimed(tmp_path)
+    store.fail(job_id, "w1", "timeout")
+    assert store.get(job_id)["status"] == QUEUED
+    assert store.claim("w2")["id"] == job_id
+
+
+def test_permanent_failure_is_not_retried(tmp_path):
+    store, job_id = _claimed(tmp_path)
+    store.fail(job_id, "w1", "OPENAI_API_KEY no está configurada", permanent=True)
+    job = store.get(job_id)
+    assert (job["status"], job["attempts"]) == (FAILED, 1)
+    assert store.claim("w2") is None
+
+
+def test_missing_api_key_is_a_permanent_error(monkeypatch):
+    pytest.importorskip("prometheus_client")
+    import generation
+
+    monkeypatch.setattr(generation, "OPENAI_API_KEY", "")
+    monkeypatch.delenv("GENSITE_MODEL", raising=False)
+    result = generation.sync_generate_code("landing")
+    assert result["permanent"] is True
+    assert "OPENAI_API_KEY" in result["error"]
+
+
+def test_worker_module_does_not_import_the_server():
+    pytest.importorskip("prometheus_client")
+    code = "import sys, generation; print([m for m in ('main', 'fastapi') if m in sys.modules])"
+    env = {**os.environ, "OPENAI_API_KEY": "sk-prueba"}
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env).stdout
+    assert output.strip() == "[]"
@@ -0,0 +1,72 @@
+import json
+
+from json_stream import IncrementalFileParser, extract_files
+
+FILES = {
+    "App.tsx": {"content": "export default () => <p>{\"}\"}</p>;\n", "language": "typescript"},
+    "styles.css": {"content": "a::after { content: \"\\\\\"; }", "language": "css"},
+    "package.json": {"content": "{\n  \"name\": \"demo\"\n}", "language": "json"},
+}
+
+
+def test_feed_emits_each_file_as_it_closes():
+    text = "```json\n" + json.dumps(FILES) + "\n```"
+    parser = IncrementalFileParser()
+    emitted = []
+    for char in text:
+        emitted.extend(parser.feed(char))
+    assert emitted == list(FILES.items())
+    assert parser.complete
+
+
+def test_escaped_quotes_and_braces_inside_strings():
+    files, truncated = extract_files(json.dumps(FILES))
+    assert files == FILES
+    assert not truncated
+
+
+def test_truncated_response_keeps_complete_entries():
+    text = json.dumps(FILES)
+    cut = text.index('"package.json"') + len('"package.json": {"content": "{\\n  ')
+    files, truncated = extract_files(text[:cut])
+    assert truncated
+    assert files == {name: FILES[name] for name in ("App.tsx", "styles.css")}
+
+
+def test_text_without_json_object():
+    assert extract_files("Lo siento, no puedo ayudar con eso.") == ({}, False)
+
+
+def test_primitive_values_and_invalid_entries():
+    files, truncated = extract_files('{"a": 1, "b": true, "c": nul, "d": null}')
+    assert files == {"a": 1, "b": True, "d": None}
+    assert not truncated
+
+
+def test_extract_ignores_prose_around_the_object():
+    text = 'Aquí tienes el "proyecto":\n' + json.dumps(FILES) + '\nUsa {"npm": "start"} para arrancarlo.'
+    files, truncated = extract_files(text)
+    assert files == FILES
+    assert not truncated
+
+
+def test_extract_takes_only_the_first_object():
+    files, truncated = extract_files('{"a.txt": {"content": "1"}} {"b.txt": {"content": "2"}}')
+    assert files == {"a.txt": {"content": "1"}}
+    assert not truncated
+
+
+def test_uneven_chunks_and_text_while_streaming():
+    text = "Aquí tienes:\n" + json.dumps({**FILES, "big.js": {"content": "x" * 50000, "language": "javascript"}})
+    parser = IncrementalFileParser()
+    emitted = []
+    position, size = 0, 1
+    while position < len(text):
+        emitted.extend(parser.feed(text[position:position + size]))
+        position += size
+        size = size % 7 + 1
+        if position % 1000 < 7:
+            # Leer el texto a mitad de respuesta no altera las posiciones pendientes
+            assert parser.text == text[:position]
+    assert dict(emitted) == {**FILES, "big.js": {"content": "x" * 50000, "language": "javascript"}}
+    assert parser.text == text
@@ -0,0 +1,45 @@
+import pytest
+
+from project_edit import apply_edit, apply_unified_diff
+
+ORIGINAL = "import React from 'react';\n\nexport default function App() {\n  return <h1>Hola</h1>;\n}\n"
+
+
+def test_applies_hunk_at_its_position():
+    diff = "@@ -4,1 +4,1 @@\n-  return <h1>Hola</h1>;\n+  return <h1>Adiós</h1>;"
+    assert apply_unified_diff(ORIGINAL, diff) == ORIGINAL.replace("Hola", "Adiós")
+
+
+def test_finds_context_when_line_numbers_are_off():
+    diff = "--- a/App.tsx\n+++ b/App.tsx\n@@ -1,2 +1,2 @@\n export default function App() {\n-  return <h1>Hola</h1>;\n+  return <h1>Hey</h1>;"
+    assert apply_unified_diff(ORIGINAL, diff) == ORIGINAL.replace("Hola", "Hey")
+
+
+def test_pure_insertion_and_multiple_hunks():
+    diff = ("@@ -1,0 +2,1 @@\n+import './styles.css';\n"
+            "@@ -4,1 +5,1 @@\n-  return <h1>Hola</h1>;\n+  return <main />;")
+    assert apply_unified_diff(ORIGINAL, diff) == (
+        "import React from 'react';\nimport './styles.css';\n\nexport default function App() {\n"
+        "  return <main />;\n}\n"
+    )
+
+
+def test_rejects_mismatched_context_and_missing_hunks():
+    with pytest.raises(ValueError):
+        apply_unified_diff(ORIGINAL, "@@ -4,1 +4,1 @@\n-  return <h2>Hola</h2>;\n+  return null;")
+    with pytest.raises(ValueError):
+        apply_unified_diff(ORIGINAL, "-  return <h1>Hola</h1>;\n+  return null;")
+
+
+def test_apply_edit_reports_only_real_changes():
+    files = {"App.tsx": {"content": ORIGINAL, "language": "typescript"}}
+    assert apply_edit(files, "App.tsx", {"content": ORIGINAL}) == (False, files["App.tsx"])
+    changed, info = apply_edit(files, "App.tsx", {"diff": "@@ -4,1 +4,1 @@\n-  return <h1>Hola</h1>;\n+  return null;"})
+    assert changed and info == {"content": ORIGINAL.replace("<h1>Hola</h1>", "null"), "language": "typescript"}
+    assert apply_edit(files, "Nuevo.css", {"content": "a {}", "language": "css"}) == (True, {"content": "a {}", "language": "css"})
+    assert apply_edit(files, "Nuevo.css", {"delete": True}) == (True, None)
+    assert apply_edit(files, "Nuevo.css", {"delete": True}) == (False, None)
+    with pytest.raises(ValueError):
+        apply_edit(files, "Falta.tsx", {"diff": "@@ -1,1 +1,1 @@\n-a\n+b"})
+    with pytest.raises(ValueError):
+        apply_edit(files, "App.tsx", "reemplazar todo")
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from scheduler import GenerationScheduler, SchedulerRejected
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_round_robin_between_clients():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_per_client=5)
+        running = scheduler.submit("a")
+        tickets = [scheduler.submit(client) for client in ("a", "a", "a", "b", "c", "b")]
+        order = []
+        current = running
+        while True:
+            current.release()
+            granted = [ticket for ticket in tickets if ticket.granted and ticket not in order]
+            if not granted:
+                break
+            assert len(granted) == 1
+            order.append(granted[0])
+            current = granted[0]
+        return [ticket.client_id for ticket in order]
+
+    assert run(scenario()) == ["a", "b", "c", "a", "b", "a"]
+
+
+def test_concurrency_cap_and_waiters():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=2)
+        tickets = [scheduler.submit(f"c{i}") for i in range(3)]
+        assert [ticket.granted for ticket in tickets] == [True, True, False]
+        waiter = asyncio.ensure_future(tickets[2].wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        tickets[0].release()
+        await asyncio.wait_for(waiter, 1)
+        assert scheduler.stats()["running"] == 2
+
+    run(scenario())
+
+
+def test_queue_limits_reject():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1, max_queue_per_client=1, max_queue=2)
+        scheduler.submit("a")
+        scheduler.submit("a")
+        with pytest.raises(SchedulerRejected):
+            scheduler.submit("a")
+        scheduler.submit("b")
+        with pytest.raises(SchedulerRejected):
+            scheduler.submit("c")
+        assert scheduler.stats()["rejected"] == 2
+
+    run(scenario())
+
+
+def test_released_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = GenerationScheduler(max_concurrent=1)
+        running = scheduler.submit("a")
+        withdrawn = scheduler.submit("b")
+        later = scheduler.submit("c")
+        withdrawn.release()
+        assert scheduler.stats()["queued"] == 1
+        running.release()
+        assert later.granted and not withdrawn.granted
+
+    run(scenario())
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import pytest
+
+from backplane import InMemoryBackplane, LocalPubSubServer, RedisBackplane
+from session_replay import SessionRouter, SessionStore
+from websocket_fanout import ConnectionHub
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, message):
+        self.received.append(json.loads(message))
+
+    async def close(self, code=1000):
+        pass
+
+
+class Worker:
+    def __init__(self, backplane, ttl=60.0):
+        self.hub = ConnectionHub()
+        self.sessions = SessionStore(capacity=64, ttl=ttl)
+        self.router = SessionRouter(self.hub, self.sessions, backplane, handoff_timeout=0.2)
+
+    async def connect(self, client_id, last_seq=None, protocol=1):
+        socket = FakeSocket()
+        channel = self.hub.add(client_id, socket)
+        await self.router.attach(client_id, channel, protocol, last_seq)
+        return socket
+
+    def disconnect(self, client_id, socket):
+        self.hub.remove(client_id, socket)
+        self.router.detach(client_id)
+
+
+async def settle(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("la condición no se cumplió a tiempo")
+
+
+def seqs(socket):
+    return [message["seq"] for message in socket.received if "seq" in message]
+
+
+@pytest.fixture
+def cluster():
+    """Dos workers unidos por el broker local compatible con Redis"""
+    async def start():
+        server = LocalPubSubServer()
+        port = await server.start("127.0.0.1", 0)
+        workers = [Worker(RedisBackplane("127.0.0.1", port)) for _ in range(2)]
+        for worker in workers:
+            await worker.router.start()
+        return server, workers
+
+    async def stop(server, workers):
+        for worker in workers:
+            await worker.router.close()
+        await server.close()
+
+    return start, stop
+
+
+def test_events_from_both_workers_share_one_sequence(cluster):
+    start, stop = cluster
+
+    async def scenario():
+        server, (owner, other) = await start()
+        socket = await owner.connect("c1")
+        for i in range(5):
+            await owner.router.send({"type": "owner", "i": i}, "c1")
+            await other.router.send({"type": "other", "i": i}, "c1")
+        await settle(lambda: len(socket.received) == 10)
+        assert seqs(socket) == list(range(1, 11))
+        # Solo el worker del socket guarda la sesión
+        assert "c1" not in other.sessions.sessions
+        await other.router.send({"type": "nadie"}, "desconocido")
+        await asyncio.sleep(0.05)
+        assert not owner.sessions.sessions.keys() - {"c1"} and not other.sessions.sessions
+        await stop(server, [owner, other])
+
+    asyncio.run(scenario())
+
+
+def test_resume_on_another_worker_hands_the_session_over(cluster):
+    start, stop = cluster
+
+    async def scenario():
+        server, (first, second) = await start()
+        socket = await first.connect("c1", last_seq=0)
+        for i in range(3):
+            await first.router.send({"type": "progress", "i": i}, "c1")
+        await settle(lambda: seqs(socket) == [1, 2, 3])
+        first.disconnect("c1", socket)
+        # Eventos mientras el cliente está desconectado
+        await first.router.send({"type": "progress", "i": 3}, "c1")
+        await second.router.send({"type": "progress", "i": 4}, "c1")
+        await asyncio.sleep(0.05)
+
+        resumed = await second.connect("c1", last_seq=2)
+        await first.router.send({"type": "progress", "i": 5}, "c1")
+        await settle(lambda: len(resumed.received) == 5)
+        assert resumed.received[0]["type"] == "resumed"
+        assert resumed.received[0]["data"]["complete"] and not resumed.received[0]["data"]["reset"]
+        assert seqs(resumed) == [3, 4, 5, 6]
+        assert "c1" in second.sessions.sessions and "c1" not in first.sessions.sessions
+        await stop(server, [first, second])
+
+    asyncio.run(scenario())
+
+
+def test_resume_without_owner_continues_numbering(cluster):
+    start, stop = cluster
+
+    async def scenario():
+        server, (first, _) = await start()
+        socket = await first.connect("c1", last_seq=7)
+        await first.router.send({"type": "progress"}, "c1")
+        await settle(lambda: len(socket.received) == 2)
+        assert socket.received[0]["data"]["reset"]
+        assert seqs(socket) == [8]
+        await stop(server, [first, _])
+
+    asyncio.run(scenario())
+
+
+def test_expiry_cancels_generations_left_on_the_previous_worker(cluster):
+    start, stop = cluster
+
+    async def scenario():
+        server, (first, second) = await start()
+        second.sessions.ttl = 0.05
+        socket = await first.connect("c1", last_seq=0)
+        generation = asyncio.create_task(asyncio.sleep(10))
+        first.router.track("c1", generation)
+        first.disconnect("c1", socket)
+        moved = await second.connect("c1", last_seq=0)
+        assert first.sessions.orphans["c1"] == {generation}
+        second.disconnect("c1", moved)
+        await settle(generation.cancelled)
+        await stop(server, [first, second])
+
+    asyncio.run(scenario())
+
+
+def test_single_process_does_not_create_sessions_for_unknown_clients():
+    async def scenario():
+        worker = Worker(InMemoryBackplane())
+        await worker.router.start()
+        await worker.router.send({"type": "job"}, "fantasma")
+        assert worker.sessions.sessions == {}
+        socket = await worker.connect("c1")
+        await worker.router.send({"type": "job"}, "c1")
+        await settle(lambda: seqs(socket) == [1])
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from singleflight import InflightTable, LeaderFailed
+
+
+class Rejected(Exception):
+    pass
+
+
+def _source(started, events, error=None, gate=None):
+    async def source():
+        started.append(True)
+        if gate is not None:
+            await gate.wait()
+        for event in events:
+            yield event
+        if error is not None:
+            raise error
+    return source
+
+
+async def _collect(iterator):
+    return [event async for event in iterator]
+
+
+def test_followers_share_one_generation():
+    async def scenario():
+        table, started, gate = InflightTable(), [], asyncio.Event()
+        leader = asyncio.ensure_future(_collect(table.share("k", "a", _source(started, [1, 2], gate=gate))))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(_collect(table.share("k", "b", _source(started, [9]))))
+        await asyncio.sleep(0)
+        gate.set()
+        assert await leader == [1, 2]
+        assert await follower == [1, 2]
+        assert len(started) == 1
+        assert table.stats == {"leaders": 1, "followers": 1, "retries": 0}
+
+    asyncio.run(scenario())
+
+
+def test_follower_retries_when_leader_is_rejected():
+    async def scenario():
+        table, started, gate = InflightTable(), [], asyncio.Event()
+        leader = asyncio.ensure_future(_collect(table.share("k", "a", _source(started, [], Rejected("cola de a"), gate))))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(_collect(table.share("k", "b", _source(started, ["de b"]))))
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(Rejected):
+            await leader
+        assert await follower == ["de b"]
+        assert table.stats["retries"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_follower_gets_generic_error_after_events():
+    async def scenario():
+        table, started, gate = InflightTable(), [], asyncio.Event()
+        leader = asyncio.ensure_future(_collect(table.share("k", "a", _source(started, [1], RuntimeError("clave de a"), gate))))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(_collect(table.share("k", "b", _source(started, [2]))))
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(RuntimeError):
+            await leader
+        with pytest.raises(LeaderFailed) as error:
+            await follower
+        assert "clave de a" not in str(error.value)
+        assert len(started) == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+import json
+from collections import namedtuple
+
+import pytest
+
+from default_templates import DEFAULT_TEMPLATES
+from template_engine import RenderCache, Template, TemplateError, TemplateRegistry, params_hash
+
+
+def render(source, **params):
+    return Template("prueba", source).render(params)
+
+
+def test_expressions_filters_and_escaping():
+    assert render("<h1>{{ titulo | escape }}</h1>", titulo="<b>Tom & Jerry</b>") == \
+        "<h1>&lt;b&gt;Tom &amp; Jerry&lt;/b&gt;</h1>"
+    assert render("{{ nombre | strip | upper }}", nombre="  ana ") == "ANA"
+    assert render("const datos = {{ datos | json }};", datos={"a": "ñ"}) == 'const datos = {"a": "ñ"};'
+    assert render("{{ vacio }}", vacio=None) == ""
+
+
+def test_blocks_and_nested_paths():
+    source = "{{#each paginas as pagina}}{{#if pagina.visible}}{{ pagina.nombre }}{{else}}-{{/if}}{{/each}}"
+    paginas = [{"nombre": "Inicio", "visible": True}, {"nombre": "Oculta", "visible": False}]
+    assert render(source, paginas=paginas) == "Inicio-"
+    assert render("{{#if not lista}}vacía{{/if}}", lista=[]) == "vacía"
+    assert render("{{ lista.1 }}", lista=["a", "b"]) == "b"
+
+
+def test_braces_that_are_not_tags_are_copied():
+    source = "<div style={{ margin: 0 }}>{{raw}}{{ no_se_toca }}{{/raw}}</div>"
+    assert render(source) == "<div style={{ margin: 0 }}>{{ no_se_toca }}</div>"
+
+
+def test_private_attributes_and_methods_are_not_reachable():
+    assert render("{{ x.__class__ }}", x=1) == "{{ x.__class__ }}"
+    Punto = namedtuple("Punto", "x y")
+    assert render("{{ p.x }},{{ p.y }}", p=Punto(1, 2)) == "1,2"
+    with pytest.raises(TemplateError):
+        render("{{ texto.upper }}", texto="abc")
+
+
+def test_errors():
+    with pytest.raises(TemplateError, match="falta el parámetro 'usuario.nombre'"):
+        render("{{ usuario.nombre }}", usuario={})
+    with pytest.raises(TemplateError):
+        render("{{#if x}}sin cerrar")
+    with pytest.raises(TemplateError):
+        render("{{/each}}")
+
+
+def test_stream_matches_render():
+    source, defaults = DEFAULT_TEMPLATES["landing"]
+    template = Template("landing", source, defaults=defaults)
+    assert "".join(template.stream({}, chunk_size=64)) == template.render({})
+
+
+def test_registry_caches_renders():
+    registry = TemplateRegistry(cache=RenderCache())
+    registry.register("saludo", "Hola {{ nombre }}")
+    assert registry.render("saludo", {"nombre": "Ana"}) == "Hola Ana"
+    assert registry.render("saludo", {"nombre": "Ana"}) == "Hola Ana"
+    assert registry.cache.stats()["hits"] == 1
+
+
+def test_params_hash_rejects_non_json_types():
+    assert params_hash({"b": [1, 2], "a": {"x": None}}) == params_hash({"a": {"x": None}, "b": [1, 2]})
+    registry = TemplateRegistry(cache=RenderCache())
+    registry.register("saludo", "Hola {{ nombre }}")
+    with pytest.raises(TemplateError, match="object"):
+        registry.render("saludo", {"nombre": object()})
+    with pytest.raises(TemplateError):
+        params_hash({"x": {1: "a", "b": 2}})
+
+
+def test_registry_loads_local_templates_on_creation(tmp_path):
+    path = tmp_path / "plantillas.json"
+    path.write_text(json.dumps({"inicio": {"version": "7", "contenido_html": "<h1>{{ titulo }}</h1>",
+                                           "estilos_css": None, "scripts_js": None}}), encoding="utf-8")
+    registry = TemplateRegistry(cache=RenderCache(), cache_path=str(path))
+    assert "inicio" in registry and "inicio.css" not in registry
+    assert registry.render("inicio", {"titulo": "Hola"}) == "<h1>Hola</h1>"
+    assert registry.get("inicio").version == "7"
@@ -0,0 +1,125 @@
+import asyncio
+import os
+
+from blob_store import BlobStore, blob_digest
+from project_files import CREATED, UNCHANGED, UPDATED
+import pytest
+
+from workspace import DEFAULT_WORKSPACE, WorkspaceManager, client_workspace
+
+
+def _manager(base, **kwargs):
+    manager = WorkspaceManager(str(base), BlobStore(os.path.join(str(base), "blobs")), **kwargs)
+    manager._ready.set()
+    return manager
+
+
+def _age_blobs(base):
+    for root, _, files in os.walk(os.path.join(str(base), "blobs")):
+        for name in files:
+            os.utime(os.path.join(root, name), (0, 0))
+
+
+def test_write_flush_and_reload(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        workspace = await manager.get("proyecto")
+        assert workspace.write("src/App.tsx", b"a") == CREATED
+        assert workspace.write("src/App.tsx", b"a") == UNCHANGED
+        assert workspace.write("src/App.tsx", b"b") == UPDATED
+        await manager.flush(workspace)
+        assert manager.store.refcounts == {blob_digest(b"b"): 1}
+        reloaded = await _manager(tmp_path).get("proyecto")
+        assert reloaded.read("src/App.tsx") == b"b"
+
+    asyncio.run(scenario())
+
+
+def test_dedup_after_delete_and_collect_in_another_worker(tmp_path):
+    async def scenario():
+        worker = _manager(tmp_path)
+        first = await worker.get("uno")
+        first.write("index.html", b"X")
+        await worker.flush(first)
+        first.delete("index.html")
+        await worker.flush(first)
+        _age_blobs(tmp_path)
+        # La recolección de otro worker borra el blob, que aquí sigue en la caché
+        other = _manager(tmp_path)
+        await other._collect()
+        assert other.store.stats()["collected"] == 1
+        second = await worker.get("dos")
+        second.write("index.html", b"X")
+        await worker.flush(second)
+        reloaded = await _manager(tmp_path).get("dos")
+        assert reloaded.read("index.html") == b"X"
+
+    asyncio.run(scenario())
+
+
+def test_write_between_snapshot_and_collect_is_kept(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        first = await manager.get("uno")
+        first.write("a.txt", b"X")
+        await manager.flush(first)
+        first.delete("a.txt")
+        await manager.flush(first)
+        _age_blobs(tmp_path)
+        in_use = manager.in_use()
+        (await manager.get("dos")).write("a.txt", b"X")
+        manager.store.collect(in_use)
+        await manager.flush(await manager.get("dos"))
+        assert (await _manager(tmp_path).get("dos")).read("a.txt") == b"X"
+
+    asyncio.run(scenario())
+
+
+def test_collect_keeps_blobs_referenced_by_other_workers(tmp_path):
+    async def scenario():
+        first, second = _manager(tmp_path), _manager(tmp_path)
+        workspace = await second.get("proyecto")
+        workspace.write("a.txt", b"compartido")
+        await second.flush(workspace)
+        _age_blobs(tmp_path)
+        await first._collect()
+        assert (await _manager(tmp_path).get("proyecto")).read("a.txt") == b"compartido"
+
+    asyncio.run(scenario())
+
+
+def test_lru_eviction_over_memory_budget(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path, memory_budget=25)
+        for i in range(4):
+            (await manager.get(f"w{i}")).write("a.txt", bytes([i]) * 10)
+        await manager.get("w0")
+        await manager._evict()
+        assert list(manager.workspaces) == ["w3", "w0"]
+        assert (await manager.get("w1")).read("a.txt") == bytes([1]) * 10
+
+    asyncio.run(scenario())
+
+
+def test_clients_do_not_see_each_other_files(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        alice, bob = client_workspace("cliente-a"), client_workspace("cliente-b")
+        assert alice != bob and DEFAULT_WORKSPACE not in (alice, bob)
+        (await manager.get(alice)).write("index.html", b"de alice")
+        (await manager.get(bob)).write("index.html", b"de bob")
+        assert (await manager.get(alice)).read("index.html") == b"de alice"
+        assert (await manager.get(bob)).read("index.html") == b"de bob"
+        assert (await manager.get(client_workspace("cliente-c"))).read("index.html") is None
+        # Tras volcar y recargar en otro worker siguen separados
+        for workspace in list(manager.workspaces.values()):
+            await manager.flush(workspace)
+        other = _manager(tmp_path)
+        assert (await other.get(client_workspace("cliente-b"))).listing() == [("index.html", blob_digest(b"de bob"))]
+
+    asyncio.run(scenario())
+
+
+def test_client_workspace_requires_client_id():
+    with pytest.raises(ValueError):
+        client_workspace("")
@@ -0,0 +1,185 @@
+"""
+Módulo de trazas por fases para el pipeline de generación
+
+Funcionalidades:
+- Una traza por generación, asociada al client_id
+- Spans anidados (espera en cola, proveedor, parseo, post-proceso, envíos...)
+- Traza actual propagada con contextvars (también a las tareas hijas)
+- Exportación a un archivo JSON Lines o a un colector local por UDP
+"""
+import contextvars
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from structured_logging import get_logger
+
+log = get_logger("tracing")
+
+
+class Span:
+    """Intervalo de tiempo con nombre y atributos dentro de una traza"""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self._start_monotonic = time.monotonic()
+        self.duration: Optional[float] = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.monotonic() - self._start_monotonic
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "client_id": self.trace.client_id,
+            "start": self.start,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Conjunto de spans de una generación"""
+
+    def __init__(self, name: str, client_id: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.client_id = client_id
+        self.spans: List[Span] = []
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("gensite_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("gensite_span", default=None)
+
+
+class JsonFileExporter:
+    """Escribe cada span como una línea JSON (en un hilo aparte)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        threading.Thread(target=self._worker, name="gensite-trace-file", daemon=True).start()
+
+    def export(self, spans: List[Dict]):
+        self._queue.put(spans)
+
+    def _worker(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for span in spans:
+                        f.write(json.dumps(span, ensure_ascii=False) + "\n")
+            except OSError as e:
+                log.warning("No se pudieron exportar las trazas", error=str(e))
+
+
+class UdpCollectorExporter:
+    """Envía cada span como un datagrama JSON a un colector local"""
+
+    def __init__(self, host: str, port: int):
+        self.address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def export(self, spans: List[Dict]):
+        for span in spans:
+            try:
+                self._socket.sendto(json.dumps(span).encode("utf-8"), self.address)
+            except OSError:
+                # El colector es opcional: si no escucha, las trazas se descartan
+                pass
+
+
+class Tracer:
+    """Crea trazas y spans; sin exportador no registra nada"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def trace(self, name: str, client_id: str, **attributes):
+        """Inicia una traza nueva con un span raíz"""
+        if not self.enabled:
+            yield None
+            return
+        trace = Trace(name, client_id)
+        trace_token = _current_trace.set(trace)
+        try:
+            with self.span(name, **attributes) as root:
+                yield root
+        finally:
+            _current_trace.reset(trace_token)
+            self.exporter.export([span.to_dict() for span in trace.spans])
+
+    def start_span(self, name: str, **attributes) -> Optional[Span]:
+        """
+        Abre un span hijo del actual sin convertirlo en el span actual; útil en
+        generadores asíncronos que ceden el control antes de cerrarlo.
+        Se cierra con span.end().
+        """
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        parent = _current_span.get()
+        span = Span(trace, name, parent.span_id if parent else None, attributes)
+        trace.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Span hijo del span actual; no hace nada fuera de una traza"""
+        if _current_trace.get() is None:
+            yield None
+            return
+        span = self.start_span(name, **attributes)
+        span_token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set("error", repr(e))
+            raise
+        finally:
+            span.end()
+            _current_span.reset(span_token)
+
+
+def exporter_from_env(value: Optional[str]):
+    """
+    Crea el exportador a partir de GENSITE_TRACE_EXPORT:
+    "file:/ruta/trazas.jsonl" o "udp://127.0.0.1:6831". Vacío desactiva las trazas.
+    """
+    if not value:
+        return None
+    if value.startswith("file:"):
+        return JsonFileExporter(os.path.expanduser(value[len("file:"):]))
+    if value.startswith("udp://"):
+        parsed = urlparse(value)
+        return UdpCollectorExporter(parsed.hostname or "127.0.0.1", parsed.port or 6831)
+    raise ValueError(f"Exportador de trazas no soportado: {value}")
+
+
+tracer = Tracer(exporter_from_env(os.environ.get("GENSITE_TRACE_EXPORT")))
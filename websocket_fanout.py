@@ -0,0 +1,124 @@
+"""
+Módulo de difusión de eventos a conexiones WebSocket
+
+Funcionalidades:
+- Codificación única de cada evento con un codificador JSON rápido (orjson si está instalado)
+- Envío concurrente: cada conexión tiene su propia cola acotada y su tarea de envío
+- Tiempo máximo por envío; los consumidores lentos se expulsan en lugar de bloquear al productor
+"""
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from structured_logging import get_logger
+
+if TYPE_CHECKING:
+    from fastapi import WebSocket
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = get_logger("websocket_fanout")
+
+# Código de cierre 1013 (Try Again Later) para consumidores expulsados
+CLOSE_SLOW_CONSUMER = 1013
+
+
+def encode_event(event: Any) -> str:
+    """Serializa un evento a JSON una sola vez para todas las conexiones"""
+    if orjson is not None:
+        return orjson.dumps(event).decode("utf-8")
+    return json.dumps(event)
+
+
+class ConnectionChannel:
+    """Conexión WebSocket con cola de envío propia"""
+
+    def __init__(self, websocket: "WebSocket", max_queue: int = 256, send_timeout: float = 10.0,
+                 on_evict: Optional[Callable[["ConnectionChannel"], None]] = None):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.closed = False
+        self._on_evict = on_evict
+        self._task = asyncio.create_task(self._sender())
+
+    def offer(self, message: str) -> bool:
+        """Encola un mensaje sin esperar; si la cola está llena expulsa la conexión"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.evict("cola de envío llena")
+            return False
+
+    async def _sender(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(message), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.evict("tiempo de envío agotado")
+                return
+            except Exception as e:
+                self.evict(f"error de envío: {e}")
+                return
+
+    def evict(self, reason: str):
+        """Cierra la conexión de un consumidor lento o caído"""
+        if self.closed:
+            return
+        log.warning("Conexión expulsada", reason=reason, pending=self.queue.qsize())
+        self.close()
+        asyncio.create_task(self._close_socket())
+        if self._on_evict is not None:
+            self._on_evict(self)
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=CLOSE_SLOW_CONSUMER)
+        except Exception:
+            pass
+
+    def close(self):
+        self.closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+
+class ConnectionHub:
+    """Conexiones agrupadas por cliente/sesión con envío no bloqueante"""
+
+    def __init__(self, max_queue: int = 256, send_timeout: float = 10.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.connections: Dict[str, List[ConnectionChannel]] = {}
+
+    def add(self, client_id: str, websocket: "WebSocket") -> ConnectionChannel:
+        channel = ConnectionChannel(
+            websocket, self.max_queue, self.send_timeout,
+            on_evict=lambda evicted: self._discard(client_id, evicted)
+        )
+        self.connections.setdefault(client_id, []).append(channel)
+        return channel
+
+    def remove(self, client_id: str, websocket: "WebSocket"):
+        for channel in list(self.connections.get(client_id, ())):
+            if channel.websocket is websocket:
+                channel.close()
+                self._discard(client_id, channel)
+
+    def _discard(self, client_id: str, channel: ConnectionChannel):
+        channels = self.connections.get(client_id)
+        if channels and channel in channels:
+            channels.remove(channel)
+            if not channels:
+                del self.connections[client_id]
+
+    def publish(self, client_id: str, message: str) -> int:
+        """Entrega un mensaje ya codificado a todas las conexiones del cliente"""
+        return sum(channel.offer(message) for channel in list(self.connections.get(client_id, ())))
@@ -0,0 +1,406 @@
+"""
+Módulo de espacios de trabajo por sesión
+
+Funcionalidades:
+- Un espacio de trabajo aislado por sesión o proyecto; cada uno es un manifiesto
+  ruta -> hash y los contenidos viven en el almacén de blobs compartido
+- Escritura diferida (write-behind): los blobs nuevos y el manifiesto se vuelcan
+  a disco en segundo plano, de forma atómica y con paralelismo acotado
+- Expulsión por inactividad (TTL) y, si los espacios abiertos superan el
+  presupuesto de memoria, de los menos usados (LRU); un espacio expulsado se
+  vuelve a cargar de su manifiesto en el siguiente acceso
+- Recolección en segundo plano de los espacios abandonados y de los blobs sin
+  referencias, sin bloquear el arranque
+- Varios procesos worker pueden compartir base_dir: la recolección vuelve a leer
+  los manifiestos de disco bajo un flock exclusivo (los volcados toman uno
+  compartido) y solo el primer worker en arrancar vacía el espacio compartido
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from blob_store import BlobStore, blob_digest
+from project_files import CREATED, UNCHANGED, UPDATED, write_atomic
+from structured_logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: un solo proceso por directorio, los bloqueos no hacen nada
+    fcntl = None
+
+log = get_logger("workspace")
+
+DEFAULT_WORKSPACE = "default"
+_WORKSPACE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def client_workspace(client_id: str) -> str:
+    """
+    Espacio de trabajo privado de un cliente, derivado en el servidor de su client_id:
+    un cliente no puede elegir el identificador de otro ni el espacio compartido
+    """
+    if not client_id:
+        raise ValueError("Falta el identificador de cliente")
+    return "c-" + hashlib.sha256(client_id.encode("utf-8")).hexdigest()[:40]
+
+
+class Workspace:
+    """Manifiesto en memoria de un espacio de trabajo"""
+
+    def __init__(self, workspace_id: str, store: BlobStore, persisted: Optional[Dict[str, List]] = None):
+        self.id = workspace_id
+        self.store = store
+        # ruta -> [hash, tamaño]; persisted es lo último guardado en disco
+        self.persisted: Optional[Dict[str, List]] = persisted
+        self.manifest: Dict[str, List] = {name: list(entry) for name, entry in (persisted or {}).items()}
+        self.dirty = False
+        self.last_access = time.monotonic()
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def write(self, name: str, data: bytes) -> str:
+        """Guarda un archivo; devuelve created, updated o unchanged"""
+        name = normalize_name(name)
+        digest = blob_digest(data)
+        previous = self.manifest.get(name)
+        self.touch()
+        if previous is not None and previous[0] == digest:
+            return UNCHANGED
+        self.store.add(data, digest)
+        self.manifest[name] = [digest, len(data)]
+        self.dirty = True
+        return CREATED if previous is None else UPDATED
+
+    def digest(self, name: str) -> Optional[str]:
+        entry = self.manifest.get(normalize_name(name))
+        return entry[0] if entry else None
+
+    def stat(self, name: str) -> Optional[Tuple[str, int]]:
+        """(hash, tamaño) del archivo o None si no existe"""
+        entry = self.manifest.get(normalize_name(name))
+        return (entry[0], entry[1]) if entry else None
+
+    def read(self, name: str) -> Optional[bytes]:
+        """Contenido del archivo (puede leer del disco: usar aread desde el event loop)"""
+        self.touch()
+        digest = self.digest(name)
+        return self.store.get(digest) if digest else None
+
+    async def aread(self, name: str) -> Optional[bytes]:
+        digest = self.digest(name)
+        if digest is None:
+            return None
+        self.touch()
+        data = self.store.peek(digest)
+        return data if data is not None else await asyncio.to_thread(self.store.get, digest)
+
+    def delete(self, name: str) -> bool:
+        if self.manifest.pop(normalize_name(name), None) is None:
+            return False
+        self.dirty = True
+        self.touch()
+        return True
+
+    def listing(self) -> List[Tuple[str, str]]:
+        """(ruta, sha256) de todos los archivos, ordenados por ruta"""
+        return sorted((name, entry[0]) for name, entry in self.manifest.items())
+
+    def digests(self) -> Set[str]:
+        return {entry[0] for entry in self.manifest.values()}
+
+    @property
+    def size(self) -> int:
+        return sum(entry[1] for entry in self.manifest.values())
+
+
+def normalize_name(name: str) -> str:
+    """Ruta relativa con "/" y sin componentes que salgan del espacio de trabajo"""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        raise ValueError(f"Ruta no permitida: {name}")
+    return "/".join(parts)
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, List]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["files"]
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(path: str, manifest: Dict[str, List]):
+    write_atomic(path, json.dumps({"files": manifest}, separators=(",", ":")).encode("utf-8"))
+
+
+def _flock(path: str, shared: bool = False, blocking: bool = True) -> Optional[int]:
+    """Abre path y toma un flock; devuelve el descriptor, o None si estaba ocupado y no se espera"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd
+    operation = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+    try:
+        fcntl.flock(fd, operation)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+@contextmanager
+def _locked(path: str, shared: bool = False) -> Iterator[None]:
+    fd = _flock(path, shared)
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+
+class WorkspaceManager:
+    """
+    Espacios de trabajo en memoria con volcado diferido a disco.
+    Los manifiestos se guardan en base_dir/manifests/<id>.json y cuentan como
+    referencias de los blobs del almacén.
+    """
+
+    def __init__(self, base_dir: str, store: BlobStore, memory_budget: int = 256 * 1024 * 1024,
+                 ttl: float = 900.0, disk_ttl: float = 86400.0, flush_interval: float = 1.0,
+                 max_parallel_writes: int = 8):
+        self.base_dir = base_dir
+        self.store = store
+        # Bytes lógicos de los espacios abiertos; sus blobs sin volcar siguen fijados en memoria
+        self.memory_budget = memory_budget
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        self.flush_interval = flush_interval
+        self.max_parallel_writes = max_parallel_writes
+        self.workspaces: "OrderedDict[str, Workspace]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Los volcados esperan a que se hayan contado las referencias de los manifiestos en disco
+        self._ready = asyncio.Event()
+        self.evictions = 0
+        # Bloqueo compartido mientras viva el proceso: indica que hay workers usando base_dir
+        self._instance_fd: Optional[int] = None
+
+    def manifest_path(self, workspace_id: str) -> str:
+        return os.path.join(self.base_dir, "manifests", f"{workspace_id}.json")
+
+    @property
+    def _gc_lock_path(self) -> str:
+        return os.path.join(self.base_dir, ".gc.lock")
+
+    async def get(self, workspace_id: str = DEFAULT_WORKSPACE) -> Workspace:
+        """Devuelve el espacio de trabajo, cargando su manifiesto si no está en memoria"""
+        if not _WORKSPACE_ID.match(workspace_id):
+            raise ValueError(f"Identificador de espacio de trabajo no válido: {workspace_id}")
+        workspace = self.workspaces.get(workspace_id)
+        if workspace is not None:
+            self.workspaces.move_to_end(workspace_id)
+            workspace.touch()
+            return workspace
+        # Varias peticiones simultáneas comparten una única carga desde disco
+        loading = self._loading.get(workspace_id)
+        if loading is None:
+            loading = self._loading[workspace_id] = asyncio.ensure_future(self._load(workspace_id))
+            loading.add_done_callback(lambda _: self._loading.pop(workspace_id, None))
+        return await asyncio.shield(loading)
+
+    async def _load(self, workspace_id: str) -> Workspace:
+        persisted = await asyncio.to_thread(_read_manifest, self.manifest_path(workspace_id))
+        workspace = Workspace(workspace_id, self.store, persisted or {})
+        self.workspaces[workspace_id] = workspace
+        return workspace
+
+    def reset_default(self) -> bool:
+        """
+        El espacio compartido empieza vacío en cada arranque; el manifiesto de la
+        ejecución anterior se sustituye en el primer volcado, en segundo plano.
+        Solo lo vacía el primer worker: si otro proceso sigue usando base_dir (un
+        hermano arrancado antes o que sobrevive a un reinicio de este) se conserva.
+        """
+        path = os.path.join(self.base_dir, ".instances.lock")
+        fd = _flock(path, blocking=False)
+        first = fd is not None
+        if first:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+        else:
+            fd = _flock(path, shared=True)
+        self._instance_fd = fd
+        if not first:
+            log.info("Espacio compartido conservado: hay otros workers activos")
+            return False
+        workspace = Workspace(DEFAULT_WORKSPACE, self.store)
+        workspace.dirty = True
+        self.workspaces[DEFAULT_WORKSPACE] = workspace
+        return True
+
+    async def flush(self, workspace: Workspace):
+        """Escribe los blobs nuevos y el manifiesto de un espacio de trabajo"""
+        await self._ready.wait()
+        manifest = {name: list(entry) for name, entry in workspace.manifest.items()}
+        workspace.dirty = False
+        previous = workspace.persisted or {}
+        digests = {entry[0] for entry in manifest.values()}
+        # Los nuevos y los reescritos aunque ya estuvieran en el manifiesto (liberan su copia en memoria)
+        new_digests = (digests - {entry[0] for entry in previous.values()}) | self.store.pending(digests)
+        semaphore = asyncio.Semaphore(self.max_parallel_writes)
+
+        async def persist(digest: str):
+            async with semaphore:
+                await asyncio.to_thread(self.store.persist, digest)
+
+        try:
+            # persist() comprueba si el blob está en disco con el bloqueo tomado: la
+            # recolección de otro proceso no puede borrarlo hasta que el manifiesto
+            # que lo usa esté guardado
+            lock = await asyncio.to_thread(_flock, self._gc_lock_path, True)
+            try:
+                await asyncio.gather(*(persist(digest) for digest in new_digests))
+                await asyncio.to_thread(_write_manifest, self.manifest_path(workspace.id), manifest)
+            finally:
+                os.close(lock)
+        except OSError as e:
+            workspace.dirty = True
+            log.warning("No se pudo volcar el espacio de trabajo", workspace=workspace.id, error=str(e))
+            return
+        self.store.incref(entry[0] for entry in manifest.values())
+        self.store.decref(entry[0] for entry in previous.values())
+        workspace.persisted = manifest
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def _count_references(self) -> Dict[str, Dict[str, List]]:
+        """Lee todos los manifiestos de disco y suma sus referencias"""
+        directory = os.path.join(self.base_dir, "manifests")
+        os.makedirs(directory, exist_ok=True)
+        manifests = {}
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                manifest = _read_manifest(entry.path) or {}
+                manifests[entry.name[:-len(".json")]] = manifest
+                self.store.incref(file[0] for file in manifest.values())
+        return manifests
+
+    async def _run(self):
+        manifests = await asyncio.to_thread(self._count_references)
+        # El espacio compartido reiniciado sustituye al manifiesto anterior
+        default = self.workspaces.get(DEFAULT_WORKSPACE)
+        if default is not None and default.persisted is None:
+            default.persisted = manifests.get(DEFAULT_WORKSPACE, {})
+        self._ready.set()
+        log.info("Referencias de blobs contadas", manifests=len(manifests), blobs=len(self.store.refcounts))
+        last_gc = 0.0
+        while True:
+            try:
+                flushed = False
+                for workspace in list(self.workspaces.values()):
+                    if workspace.dirty:
+                        await self.flush(workspace)
+                        flushed = True
+                if flushed:
+                    # Contenidos sobrescritos antes de llegar a disco
+                    self.store.drop_pending(self.in_use())
+                await self._evict()
+                if time.monotonic() - last_gc > min(self.disk_ttl, 3600):
+                    await self._collect()
+                    last_gc = time.monotonic()
+            except Exception as e:
+                log.error("Error en el mantenimiento de espacios de trabajo", error=str(e))
+            await asyncio.sleep(self.flush_interval)
+
+    async def _evict(self):
+        """Saca de memoria los espacios inactivos y, si hace falta, los menos usados"""
+        now = time.monotonic()
+        used = sum(workspace.size for workspace in self.workspaces.values())
+        # self.workspaces va del menos al más usado recientemente
+        for workspace_id, workspace in list(self.workspaces.items()):
+            expired = now - workspace.last_access > self.ttl
+            if not expired and used <= self.memory_budget:
+                continue
+            if workspace.dirty:
+                await self.flush(workspace)
+            # Puede haber cambiado mientras se volcaba
+            if workspace.dirty or self.workspaces.get(workspace_id) is not workspace:
+                continue
+            del self.workspaces[workspace_id]
+            used -= workspace.size
+            self.evictions += 1
+            log.info("Espacio de trabajo expulsado de memoria", workspace=workspace_id,
+                     reason="ttl" if expired else "memory", bytes=workspace.size)
+
+    def in_use(self) -> Set[str]:
+        """Blobs referenciados por los manifiestos en memoria (aunque no estén volcados)"""
+        return set().union(*(workspace.digests() for workspace in self.workspaces.values()))
+
+    async def _collect(self):
+        """
+        Borra los manifiestos abandonados y los blobs que se quedan sin referencias.
+        Los contadores de referencias solo conocen los volcados de este proceso, así
+        que las referencias se recalculan con todos los manifiestos de disco, leídos
+        en el mismo bloqueo exclusivo en el que se borra.
+        """
+        in_use = self.in_use()
+        self.store.drop_pending(in_use)
+        open_ids = set(self.workspaces)
+
+        def collect() -> Tuple[int, int]:
+            removed = 0
+            referenced: Set[str] = set()
+            cutoff = time.time() - self.disk_ttl
+            directory = os.path.join(self.base_dir, "manifests")
+            with _locked(self._gc_lock_path):
+                for entry in os.scandir(directory):
+                    if not entry.name.endswith(".json"):
+                        continue
+                    manifest = _read_manifest(entry.path) or {}
+                    if entry.name[:-len(".json")] not in open_ids and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        self.store.decref(file[0] for file in manifest.values())
+                        removed += 1
+                    else:
+                        referenced.update(file[0] for file in manifest.values())
+                return removed, self.store.collect(in_use | referenced)
+
+        try:
+            manifests, blobs = await asyncio.to_thread(collect)
+        except OSError as e:
+            log.warning("No se pudieron limpiar los espacios de trabajo", error=str(e))
+            return
+        if manifests or blobs:
+            log.info("Espacios de trabajo y blobs sin uso eliminados", manifests=manifests, blobs=blobs)
+
+    async def close(self):
+        """Detiene el mantenimiento y vuelca todo lo pendiente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._ready.is_set():
+            for workspace in list(self.workspaces.values()):
+                if workspace.dirty:
+                    await self.flush(workspace)
+        if self._instance_fd is not None:
+            os.close(self._instance_fd)
+            self._instance_fd = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workspaces": len(self.workspaces),
+            "logical_bytes": sum(workspace.size for workspace in self.workspaces.values()),
+            "dirty": sum(1 for workspace in self.workspaces.values() if workspace.dirty),
+            "evictions": self.evictions,
+            **self.store.stats(),
+        }
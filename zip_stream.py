@@ -0,0 +1,144 @@
+"""
+Módulo de escritura de archivos ZIP en streaming
+
+Funcionalidades:
+- Entradas ya comprimidas reutilizables para montar ZIP sin volver a comprimir
+- Genera el ZIP por fragmentos, sin construir el archivo completo en memoria
+- Los archivos grandes se comprimen por fragmentos mientras se envían (con
+  descriptor de datos tras el contenido), sin guardar la entrada comprimida entera
+- Guarda sin comprimir (ZIP_STORED) los formatos que ya vienen comprimidos
+- Es un iterador síncrono: StreamingResponse lo recorre en el thread pool
+"""
+import hashlib
+import os
+import struct
+import time
+import zlib
+from typing import Generator, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+STORED = 0
+DEFLATED = 8
+
+# Formatos que ya están comprimidos: deflate solo gastaría CPU
+COMPRESSED_EXTENSIONS = frozenset((
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".svgz", ".ico",
+    ".woff", ".woff2", ".mp3", ".mp4", ".webm", ".ogg",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".br", ".7z", ".pdf",
+))
+
+_UTF8_FLAG = 0x800
+# CRC y tamaños van en un descriptor de datos después del contenido
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipEntry(NamedTuple):
+    """Entrada ya comprimida, lista para copiarse tal cual en cualquier ZIP"""
+    arcname: str
+    method: int
+    crc: int
+    size: int
+    data: bytes
+    dos_time: int
+    dos_date: int
+    digest: str
+
+
+class StreamedFile(NamedTuple):
+    """Archivo que se comprime por fragmentos al escribir el ZIP; no es reutilizable"""
+    arcname: str
+    data: bytes
+
+
+def compression_for(name: str) -> int:
+    return STORED if os.path.splitext(name)[1].lower() in COMPRESSED_EXTENSIONS else DEFLATED
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+def _local_header(name: bytes, flags: int, method: int, dos_time: int, dos_date: int,
+                  crc: int = 0, compressed_size: int = 0, size: int = 0) -> bytes:
+    return struct.pack(
+        "<IHHHHHIIIHH", 0x04034B50, 20, flags, method, dos_time, dos_date, crc, compressed_size, size, len(name), 0
+    ) + name
+
+
+def _central_header(name: bytes, flags: int, method: int, dos_time: int, dos_date: int,
+                    crc: int, compressed_size: int, size: int, offset: int) -> bytes:
+    return struct.pack(
+        "<IHHHHHHIIIHHHHHII", 0x02014B50, 20, 20, flags, method, dos_time, dos_date,
+        crc, compressed_size, size, len(name), 0, 0, 0, 0, 0, offset
+    ) + name
+
+
+def _end_of_directory(count: int, directory_size: int, offset: int) -> bytes:
+    return struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count, directory_size, offset, 0)
+
+
+def compressed_chunks(data: bytes, method: int, level: int = 6) -> Iterator[bytes]:
+    """Contenido de la entrada en fragmentos de como mucho CHUNK_SIZE bytes de entrada"""
+    view = memoryview(data)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if method == DEFLATED else None
+    for start in range(0, len(view), CHUNK_SIZE):
+        block = view[start:start + CHUNK_SIZE]
+        chunk = compressor.compress(block) if compressor is not None else bytes(block)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def compress_bytes(arcname: str, data: bytes, timestamp: Optional[float] = None, level: int = 6) -> ZipEntry:
+    """Comprime un archivo en memoria en una entrada reutilizable"""
+    method = compression_for(arcname)
+    dos_time, dos_date = _dos_datetime(time.time() if timestamp is None else timestamp)
+    compressed = b"".join(compressed_chunks(data, method, level)) if method == DEFLATED else data
+    return ZipEntry(arcname, method, zlib.crc32(data), len(data), compressed, dos_time, dos_date,
+                    hashlib.sha256(data).hexdigest())
+
+
+def _stream_file(file: StreamedFile, offset: int) -> Generator[bytes, None, Tuple[int, bytes]]:
+    """Escribe la entrada según se comprime; devuelve lo escrito y su cabecera central"""
+    name = file.arcname.encode("utf-8")
+    flags = _UTF8_FLAG | _DATA_DESCRIPTOR_FLAG
+    method = compression_for(file.arcname)
+    dos_time, dos_date = _dos_datetime(time.time())
+    header = _local_header(name, flags, method, dos_time, dos_date)
+    yield header
+    compressed_size = 0
+    for chunk in compressed_chunks(file.data, method):
+        compressed_size += len(chunk)
+        yield chunk
+    crc = zlib.crc32(file.data)
+    descriptor = struct.pack("<IIII", 0x08074B50, crc, compressed_size, len(file.data))
+    yield descriptor
+    central = _central_header(name, flags, method, dos_time, dos_date, crc, compressed_size, len(file.data), offset)
+    return len(header) + compressed_size + len(descriptor), central
+
+
+def zip_from_entries(entries: Iterable[Union[ZipEntry, StreamedFile]]) -> Iterator[bytes]:
+    """Itera sobre los fragmentos de un ZIP montado con entradas ya comprimidas o por comprimir"""
+    central: List[bytes] = []
+    offset = 0
+    for entry in entries:
+        if isinstance(entry, StreamedFile):
+            written, header = yield from _stream_file(entry, offset)
+            central.append(header)
+            offset += written
+            continue
+        name = entry.arcname.encode("utf-8")
+        header = _local_header(name, _UTF8_FLAG, entry.method, entry.dos_time, entry.dos_date,
+                               entry.crc, len(entry.data), entry.size)
+        yield header
+        yield entry.data
+        central.append(_central_header(name, _UTF8_FLAG, entry.method, entry.dos_time, entry.dos_date,
+                                       entry.crc, len(entry.data), entry.size, offset))
+        offset += len(header) + len(entry.data)
+    directory = b"".join(central)
+    yield directory
+    yield _end_of_directory(len(central), len(directory), offset)